@@ -1,6 +1,10 @@
 import sys
+import time
 import types
 
+# starts profiling the imports below when PROFILE_STARTUP is set
+from src.profiling_startup import import_profiler
+
 # Python 3.13 removed audioop from stdlib; pydub (a gradio dep) needs it.
 # Provide minimal stubs so the import doesn't crash the leaderboard.
 try:
@@ -54,14 +58,16 @@ import os
 
 import gradio as gr
 from apscheduler.schedulers.background import BackgroundScheduler
-from huggingface_hub import snapshot_download
 
 from src.about import (
     BENCHMARKS_TEXT, EVALUATION_QUEUE_TEXT, INTRODUCTION_TEXT, TITLE,
     CITATION_BUTTON_LABEL, CITATION_BUTTON_TEXT
 )
 from src.benchmarks import LongDocBenchmarks, QABenchmarks
-from src.columns import COL_NAME_RERANKING_MODEL, COL_NAME_RETRIEVAL_MODEL
+from src.columns import (
+    COL_NAME_IS_ANONYMOUS,
+    COL_NAME_RERANKING_MODEL_NAME,
+)
 from src.components import (
     get_anonymous_checkbox,
     get_domain_dropdown,
@@ -83,30 +89,44 @@ from src.envs import (
     EVAL_RESULTS_PATH,
     LATEST_BENCHMARK_VERSION,
     METRIC_LIST,
+    PROFILE_STARTUP,
     REPO_ID,
     RESULTS_REPO,
+    SCORE_CACHE_PATH,
     TOKEN,
 )
-from src.loaders import load_eval_results
-from src.models import TaskType, model_hyperlink
-from src.utils import remove_html, reset_rank, set_listeners, submit_results, update_metric, upload_file
+from src.loaders import load_eval_results, refresh_eval_results
+from src.models import TaskType
+from src.sync import HubResultsSource, sync_eval_results
+from src.utils import (
+    VIEW_RERANKING_ONLY,
+    VIEW_RETRIEVAL_ONLY,
+    check_submission,
+    get_leaderboard_view,
+    get_submission_status,
+    set_listeners,
+    submit_results,
+    upload_file,
+)
+
+if PROFILE_STARTUP:
+    import_profiler.stop()
+    print(f"Import time of the modules at startup\n{import_profiler.report()}")
 
 
 def restart_space():
     API.restart_space(repo_id=REPO_ID)
 
 
+def download_eval_results():
+    # only the result files of the listed versions are fetched, and only when they changed since the last download
+    sync_eval_results(HubResultsSource(RESULTS_REPO, token=TOKEN), EVAL_RESULTS_PATH)
+
+
 try:
     if os.environ.get("LOCAL_MODE", False):
         print("Loading the data")
-        snapshot_download(
-            repo_id=RESULTS_REPO,
-            local_dir=EVAL_RESULTS_PATH,
-            repo_type="dataset",
-            tqdm_class=None,
-            etag_timeout=30,
-            token=TOKEN,
-        )
+        download_eval_results()
     else:
         print("Running in local mode")
 except Exception:
@@ -114,181 +134,67 @@ except Exception:
     restart_space()
 
 global ds_dict
-ds_dict = load_eval_results(EVAL_RESULTS_PATH)
-global datastore
+start_time = time.perf_counter()
+# only the latest version is loaded before the UI starts, the others are loaded in the background
+ds_dict = load_eval_results(EVAL_RESULTS_PATH, cache_path=SCORE_CACHE_PATH, lazy=True)
+ds_dict.preload()
+if PROFILE_STARTUP:
+    print(f"Loading the eval results took {time.perf_counter() - start_time:.2f}s")
+# the latest version only provides the initial values of the components,
+# the event handlers look up the datastore of the version selected in each session
 datastore = ds_dict[LATEST_BENCHMARK_VERSION]
 
 
-def update_qa_metric(
-    metric: str,
-    domains: list,
-    langs: list,
-    reranking_model: list,
-    query: str,
-    show_anonymous: bool,
-    show_revision_and_timestamp: bool,
-):
-    global datastore
-    return update_metric(
-        datastore,
-        TaskType.qa,
-        metric,
-        domains,
-        langs,
-        reranking_model,
-        query,
-        show_anonymous,
-        show_revision_and_timestamp,
-    )
-
-
-def update_doc_metric(
-    metric: str,
-    domains: list,
-    langs: list,
-    reranking_model: list,
-    query: str,
-    show_anonymous: bool,
-    show_revision_and_timestamp,
-):
-    global datastore
-    return update_metric(
-        datastore,
-        TaskType.long_doc,
-        metric,
-        domains,
-        langs,
-        reranking_model,
-        query,
-        show_anonymous,
-        show_revision_and_timestamp,
-    )
-
-
-def update_datastore(version):
-    global datastore
+def refresh_data():
     global ds_dict
-    if datastore.version != version:
-        print(f"updated data version: {datastore.version} -> {version}")
-        datastore = ds_dict[version]
-    else:
-        print(f"current data version: {datastore.version}")
-    return datastore
-
-
-def update_qa_domains(version):
-    datastore = update_datastore(version)
-    domain_elem = get_domain_dropdown(QABenchmarks[datastore.slug])
-    return domain_elem
-
-
-def update_doc_domains(version):
-    datastore = update_datastore(version)
-    domain_elem = get_domain_dropdown(LongDocBenchmarks[datastore.slug])
-    return domain_elem
-
-
-def update_qa_langs(version):
-    datastore = update_datastore(version)
-    lang_elem = get_language_dropdown(QABenchmarks[datastore.slug])
-    return lang_elem
-
-
-def update_doc_langs(version):
-    datastore = update_datastore(version)
-    lang_elem = get_language_dropdown(LongDocBenchmarks[datastore.slug])
-    return lang_elem
-
-
-def update_qa_models(version):
-    datastore = update_datastore(version)
-    model_elem = get_reranking_dropdown(datastore.reranking_models)
-    return model_elem
-
-
-def update_qa_df_ret_rerank(version):
-    datastore = update_datastore(version)
-    return get_leaderboard_table(datastore.qa_fmt_df, datastore.qa_types)
-
-
-def update_qa_hidden_df_ret_rerank(version):
-    datastore = update_datastore(version)
-    return get_leaderboard_table(datastore.qa_raw_df, datastore.qa_types, visible=False)
-
-
-def update_doc_df_ret_rerank(version):
-    datastore = update_datastore(version)
-    return get_leaderboard_table(datastore.doc_fmt_df, datastore.doc_types)
-
-
-def update_doc_hidden_df_ret_rerank(version):
-    datastore = update_datastore(version)
-    return get_leaderboard_table(datastore.doc_raw_df, datastore.doc_types, visible=False)
-
-
-def filter_df_ret(df):
-    df_ret = df[df[COL_NAME_RERANKING_MODEL] == "NoReranker"]
-    df_ret = reset_rank(df_ret)
-    return df_ret
-
-
-def update_qa_df_ret(version):
-    datastore = update_datastore(version)
-    df_ret = filter_df_ret(datastore.qa_fmt_df)
-    return get_leaderboard_table(df_ret, datastore.qa_types)
-
-
-def update_qa_hidden_df_ret(version):
-    datastore = update_datastore(version)
-    df_ret_hidden = filter_df_ret(datastore.qa_raw_df)
-    return get_leaderboard_table(df_ret_hidden, datastore.qa_types, visible=False)
-
-
-def update_doc_df_ret(version):
-    datastore = update_datastore(version)
-    df_ret = filter_df_ret(datastore.doc_fmt_df)
-    return get_leaderboard_table(df_ret, datastore.doc_types)
-
-
-def update_doc_hidden_df_ret(version):
-    datastore = update_datastore(version)
-    df_ret_hidden = filter_df_ret(datastore.doc_raw_df)
-    return get_leaderboard_table(df_ret_hidden, datastore.doc_types, visible=False)
-
-
-def filter_df_rerank(df):
-    df_rerank = df[df[COL_NAME_RETRIEVAL_MODEL] == BM25_LINK]
-    df_rerank = reset_rank(df_rerank)
-    return df_rerank
-
-
-def update_qa_df_rerank(version):
-    datastore = update_datastore(version)
-    df_rerank = filter_df_rerank(datastore.qa_fmt_df)
-    return get_leaderboard_table(df_rerank, datastore.qa_types)
-
-
-def update_qa_hidden_df_rerank(version):
-    datastore = update_datastore(version)
-    df_rerank_hidden = filter_df_rerank(datastore.qa_raw_df)
-    return get_leaderboard_table(df_rerank_hidden, datastore.qa_types, visible=False)
-
-
-def update_doc_df_rerank(version):
-    datastore = update_datastore(version)
-    df_rerank = filter_df_rerank(datastore.doc_fmt_df)
-    return get_leaderboard_table(df_rerank, datastore.doc_types)
+    try:
+        if os.environ.get("LOCAL_MODE", False):
+            download_eval_results()
+    except Exception:
+        print("failed to download")
+        return
+    refresh_eval_results(EVAL_RESULTS_PATH, ds_dict, cache_path=SCORE_CACHE_PATH)
+
+
+def get_datastore(version):
+    return ds_dict[version]
+
+
+def update_version(version):
+    # the components of both tasks that depend on the version, the datastore is looked up once for all of them
+    datastore = get_datastore(version)
+    qa_df_ret = get_leaderboard_view(datastore, TaskType.qa, VIEW_RETRIEVAL_ONLY)
+    qa_df_rerank = get_leaderboard_view(datastore, TaskType.qa, VIEW_RERANKING_ONLY)
+    doc_df_ret = get_leaderboard_view(datastore, TaskType.long_doc, VIEW_RETRIEVAL_ONLY)
+    doc_df_rerank = get_leaderboard_view(datastore, TaskType.long_doc, VIEW_RERANKING_ONLY)
+    qa_outputs = [
+        get_domain_dropdown(QABenchmarks[datastore.slug]),
+        get_language_dropdown(QABenchmarks[datastore.slug]),
+        get_reranking_dropdown(datastore.reranking_models),
+        get_leaderboard_table(datastore.qa_fmt_df, datastore.qa_types),
+        get_reranking_dropdown(datastore.reranking_models),
+        get_leaderboard_table(qa_df_ret, datastore.qa_types),
+        get_reranking_dropdown(datastore.reranking_models),
+        get_leaderboard_table(qa_df_rerank, datastore.qa_types),
+    ]
+    doc_outputs = [
+        get_domain_dropdown(LongDocBenchmarks[datastore.slug]),
+        get_language_dropdown(LongDocBenchmarks[datastore.slug]),
+        get_reranking_dropdown(datastore.reranking_models),
+        get_leaderboard_table(datastore.doc_fmt_df, datastore.doc_types),
+        get_leaderboard_table(doc_df_ret, datastore.doc_types),
+        get_leaderboard_table(doc_df_rerank, datastore.doc_types),
+    ]
+    return qa_outputs + doc_outputs
 
 
-def update_doc_hidden_df_rerank(version):
-    datastore = update_datastore(version)
-    df_rerank_hidden = filter_df_rerank(datastore.doc_raw_df)
-    return get_leaderboard_table(df_rerank_hidden, datastore.doc_types, visible=False)
+def get_shown_reranking_models(df):
+    # the reranking models of the submissions shown by default, i.e. the non-anonymous ones
+    return df[~df[COL_NAME_IS_ANONYMOUS]][COL_NAME_RERANKING_MODEL_NAME].unique().tolist()
 
 
 demo = gr.Blocks(css=custom_css)
 
-BM25_LINK = model_hyperlink("https://github.com/castorini/pyserini", "BM25")
 
 with demo:
     gr.HTML(TITLE)
@@ -305,11 +211,9 @@ with demo:
                         # select domain
                         with gr.Row():
                             domains = get_domain_dropdown(QABenchmarks[datastore.slug])
-                            version.change(update_qa_domains, version, domains)
                         # select language
                         with gr.Row():
                             langs = get_language_dropdown(QABenchmarks[datastore.slug])
-                            version.change(update_qa_langs, version, langs)
                     with gr.Column():
                         # select the metric
                         metric = get_metric_dropdown(METRIC_LIST, DEFAULT_METRIC_QA)
@@ -318,7 +222,7 @@ with demo:
                         with gr.Row():
                             show_rev_ts = get_revision_and_ts_checkbox()
                 with gr.Tabs(elem_classes="tab-buttons") as sub_tabs:
-                    with gr.TabItem("Retrieval + Reranking", id=10):
+                    with gr.TabItem("Retrieval + Reranking", id=10) as qa_tab_ret_rerank:
                         with gr.Row():
                             # search retrieval models
                             with gr.Column():
@@ -326,139 +230,73 @@ with demo:
                             # select reranking models
                             with gr.Column():
                                 models = get_reranking_dropdown(datastore.reranking_models)
-                                version.change(update_qa_models, version, models)
                         #  shown_table
                         qa_df_elem_ret_rerank = get_leaderboard_table(datastore.qa_fmt_df, datastore.qa_types)
-                        version.change(update_qa_df_ret_rerank, version, qa_df_elem_ret_rerank)
-                        # Dummy leaderboard for handling the case when the user uses backspace key
-                        qa_df_elem_ret_rerank_hidden = get_leaderboard_table(
-                            datastore.qa_raw_df, datastore.qa_types, visible=False
-                        )
-                        version.change(update_qa_hidden_df_ret_rerank, version, qa_df_elem_ret_rerank_hidden)
-
-                        set_listeners(
-                            TaskType.qa,
-                            qa_df_elem_ret_rerank,
-                            qa_df_elem_ret_rerank_hidden,
-                            search_bar,
-                            version,
-                            domains,
-                            langs,
-                            models,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
-
-                        # set metric listener
-                        metric.change(
-                            update_qa_metric,
-                            [metric, domains, langs, models, search_bar, show_anonymous, show_rev_ts],
-                            qa_df_elem_ret_rerank,
-                            queue=True,
-                        )
 
-                    with gr.TabItem("Retrieval Only", id=11):
+                    with gr.TabItem("Retrieval Only", id=11) as qa_tab_ret:
                         with gr.Row():
                             with gr.Column(scale=1):
                                 search_bar_ret = get_search_bar()
                             with gr.Column(scale=1):
                                 models_ret = get_noreranking_dropdown()
-                                version.change(update_qa_models, version, models_ret)
-                        _qa_df_ret = filter_df_ret(datastore.qa_fmt_df)
+                        _qa_df_ret = get_leaderboard_view(datastore, TaskType.qa, VIEW_RETRIEVAL_ONLY)
                         qa_df_elem_ret = get_leaderboard_table(_qa_df_ret, datastore.qa_types)
-                        version.change(update_qa_df_ret, version, qa_df_elem_ret)
-
-                        # Dummy leaderboard for handling the case when the user uses backspace key
-                        _qa_df_ret_hidden = filter_df_ret(datastore.qa_raw_df)
-                        qa_df_elem_ret_hidden = get_leaderboard_table(
-                            _qa_df_ret_hidden, datastore.qa_types, visible=False
-                        )
-                        version.change(update_qa_hidden_df_ret, version, qa_df_elem_ret_hidden)
-
-                        set_listeners(
-                            TaskType.qa,
-                            qa_df_elem_ret,
-                            qa_df_elem_ret_hidden,
-                            search_bar_ret,
-                            version,
-                            domains,
-                            langs,
-                            models_ret,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
 
-                        metric.change(
-                            update_qa_metric,
-                            [
-                                metric,
-                                domains,
-                                langs,
-                                models_ret,
-                                search_bar_ret,
-                                show_anonymous,
-                                show_rev_ts,
-                            ],
-                            qa_df_elem_ret,
-                            queue=True,
+                    with gr.TabItem("Reranking Only", id=12) as qa_tab_rerank:
+                        _qa_df_rerank = get_leaderboard_view(datastore, TaskType.qa, VIEW_RERANKING_ONLY)
+                        _qa_df_rerank_hidden = get_leaderboard_view(
+                            datastore, TaskType.qa, VIEW_RERANKING_ONLY, hidden=True
                         )
-
-                    with gr.TabItem("Reranking Only", id=12):
-                        _qa_df_rerank = filter_df_rerank(datastore.qa_fmt_df)
-                        qa_rerank_models = _qa_df_rerank[COL_NAME_RERANKING_MODEL].apply(remove_html).unique().tolist()
+                        qa_rerank_models = get_shown_reranking_models(_qa_df_rerank_hidden)
                         with gr.Row():
                             with gr.Column(scale=1):
                                 qa_models_rerank = get_reranking_dropdown(qa_rerank_models)
-                                version.change(update_qa_models, version, qa_models_rerank)
                             with gr.Column(scale=1):
                                 qa_search_bar_rerank = gr.Textbox(show_label=False, visible=False)
                         qa_df_elem_rerank = get_leaderboard_table(_qa_df_rerank, datastore.qa_types)
-                        version.change(update_qa_df_rerank, version, qa_df_elem_rerank)
-
-                        _qa_df_rerank_hidden = filter_df_rerank(datastore.qa_raw_df)
-                        qa_df_elem_rerank_hidden = get_leaderboard_table(
-                            _qa_df_rerank_hidden, datastore.qa_types, visible=False
-                        )
-                        version.change(update_qa_hidden_df_rerank, version, qa_df_elem_rerank_hidden)
 
-                        set_listeners(
-                            TaskType.qa,
+                set_listeners(
+                    TaskType.qa,
+                    [
+                        (qa_tab_ret_rerank, qa_df_elem_ret_rerank, None, search_bar, models),
+                        (qa_tab_ret, qa_df_elem_ret, VIEW_RETRIEVAL_ONLY, search_bar_ret, models_ret),
+                        (
+                            qa_tab_rerank,
                             qa_df_elem_rerank,
-                            qa_df_elem_rerank_hidden,
+                            VIEW_RERANKING_ONLY,
                             qa_search_bar_rerank,
-                            version,
-                            domains,
-                            langs,
                             qa_models_rerank,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
+                        ),
+                    ],
+                    version,
+                    metric,
+                    domains,
+                    langs,
+                    show_anonymous,
+                    show_rev_ts,
+                    get_datastore,
+                )
+
+                qa_version_outputs = [
+                    domains,
+                    langs,
+                    models,
+                    qa_df_elem_ret_rerank,
+                    models_ret,
+                    qa_df_elem_ret,
+                    qa_models_rerank,
+                    qa_df_elem_rerank,
+                ]
 
-                        metric.change(
-                            update_qa_metric,
-                            [
-                                metric,
-                                domains,
-                                langs,
-                                qa_models_rerank,
-                                qa_search_bar_rerank,
-                                show_anonymous,
-                                show_rev_ts,
-                            ],
-                            qa_df_elem_rerank,
-                            queue=True,
-                        )
             with gr.TabItem("Long Doc", elem_id="long-doc-benchmark-tab-table", id=1):
                 with gr.Row():
                     with gr.Column(min_width=320):
                         # select domain
                         with gr.Row():
                             domains = get_domain_dropdown(LongDocBenchmarks[datastore.slug])
-                            version.change(update_doc_domains, version, domains)
                         # select language
                         with gr.Row():
                             langs = get_language_dropdown(LongDocBenchmarks[datastore.slug])
-                            version.change(update_doc_langs, version, langs)
                     with gr.Column():
                         # select the metric
                         with gr.Row():
@@ -468,142 +306,70 @@ with demo:
                         with gr.Row():
                             show_rev_ts = get_revision_and_ts_checkbox()
                 with gr.Tabs(elem_classes="tab-buttons"):
-                    with gr.TabItem("Retrieval + Reranking", id=20):
+                    with gr.TabItem("Retrieval + Reranking", id=20) as doc_tab_ret_rerank:
                         with gr.Row():
                             with gr.Column():
                                 search_bar = get_search_bar()
                             with gr.Column():
                                 models = get_reranking_dropdown(datastore.reranking_models)
-                                version.change(update_qa_models, version, models)
 
                         doc_df_elem_ret_rerank = get_leaderboard_table(datastore.doc_fmt_df, datastore.doc_types)
 
-                        version.change(update_doc_df_ret_rerank, version, doc_df_elem_ret_rerank)
-
-                        doc_df_elem_ret_rerank_hidden = get_leaderboard_table(
-                            datastore.doc_raw_df, datastore.doc_types, visible=False
-                        )
-
-                        version.change(update_doc_hidden_df_ret_rerank, version, doc_df_elem_ret_rerank_hidden)
-
-                        set_listeners(
-                            TaskType.long_doc,
-                            doc_df_elem_ret_rerank,
-                            doc_df_elem_ret_rerank_hidden,
-                            search_bar,
-                            version,
-                            domains,
-                            langs,
-                            models,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
-
-                        # set metric listener
-                        metric.change(
-                            update_doc_metric,
-                            [
-                                metric,
-                                domains,
-                                langs,
-                                models,
-                                search_bar,
-                                show_anonymous,
-                                show_rev_ts,
-                            ],
-                            doc_df_elem_ret_rerank,
-                            queue=True,
-                        )
-                    with gr.TabItem("Retrieval Only", id=21):
+                    with gr.TabItem("Retrieval Only", id=21) as doc_tab_ret:
                         with gr.Row():
                             with gr.Column(scale=1):
                                 search_bar_ret = get_search_bar()
                             with gr.Column(scale=1):
                                 models_ret = get_noreranking_dropdown()
-                        _doc_df_ret = filter_df_ret(datastore.doc_fmt_df)
+                        _doc_df_ret = get_leaderboard_view(datastore, TaskType.long_doc, VIEW_RETRIEVAL_ONLY)
                         doc_df_elem_ret = get_leaderboard_table(_doc_df_ret, datastore.doc_types)
-                        version.change(update_doc_df_ret, version, doc_df_elem_ret)
 
-                        _doc_df_ret_hidden = filter_df_ret(datastore.doc_raw_df)
-                        doc_df_elem_ret_hidden = get_leaderboard_table(
-                            _doc_df_ret_hidden, datastore.doc_types, visible=False
-                        )
-                        version.change(update_doc_hidden_df_ret, version, doc_df_elem_ret_hidden)
-
-                        set_listeners(
-                            TaskType.long_doc,
-                            doc_df_elem_ret,
-                            doc_df_elem_ret_hidden,
-                            search_bar_ret,
-                            version,
-                            domains,
-                            langs,
-                            models_ret,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
-
-                        metric.change(
-                            update_doc_metric,
-                            [
-                                metric,
-                                domains,
-                                langs,
-                                models_ret,
-                                search_bar_ret,
-                                show_anonymous,
-                                show_rev_ts,
-                            ],
-                            doc_df_elem_ret,
-                            queue=True,
-                        )
-                    with gr.TabItem("Reranking Only", id=22):
-                        _doc_df_rerank = filter_df_rerank(datastore.doc_fmt_df)
-                        doc_rerank_models = (
-                            _doc_df_rerank[COL_NAME_RERANKING_MODEL].apply(remove_html).unique().tolist()
+                    with gr.TabItem("Reranking Only", id=22) as doc_tab_rerank:
+                        _doc_df_rerank = get_leaderboard_view(datastore, TaskType.long_doc, VIEW_RERANKING_ONLY)
+                        _doc_df_rerank_hidden = get_leaderboard_view(
+                            datastore, TaskType.long_doc, VIEW_RERANKING_ONLY, hidden=True
                         )
+                        doc_rerank_models = get_shown_reranking_models(_doc_df_rerank_hidden)
                         with gr.Row():
                             with gr.Column(scale=1):
                                 doc_models_rerank = get_reranking_dropdown(doc_rerank_models)
                             with gr.Column(scale=1):
                                 doc_search_bar_rerank = gr.Textbox(show_label=False, visible=False)
                         doc_df_elem_rerank = get_leaderboard_table(_doc_df_rerank, datastore.doc_types)
-                        version.change(update_doc_df_rerank, version, doc_df_elem_rerank)
-
-                        _doc_df_rerank_hidden = filter_df_rerank(datastore.doc_raw_df)
-                        doc_df_elem_rerank_hidden = get_leaderboard_table(
-                            _doc_df_rerank_hidden, datastore.doc_types, visible=False
-                        )
-
-                        version.change(update_doc_hidden_df_rerank, version, doc_df_elem_rerank_hidden)
 
-                        set_listeners(
-                            TaskType.long_doc,
+                set_listeners(
+                    TaskType.long_doc,
+                    [
+                        (doc_tab_ret_rerank, doc_df_elem_ret_rerank, None, search_bar, models),
+                        (doc_tab_ret, doc_df_elem_ret, VIEW_RETRIEVAL_ONLY, search_bar_ret, models_ret),
+                        (
+                            doc_tab_rerank,
                             doc_df_elem_rerank,
-                            doc_df_elem_rerank_hidden,
+                            VIEW_RERANKING_ONLY,
                             doc_search_bar_rerank,
-                            version,
-                            domains,
-                            langs,
                             doc_models_rerank,
-                            show_anonymous,
-                            show_rev_ts,
-                        )
+                        ),
+                    ],
+                    version,
+                    metric,
+                    domains,
+                    langs,
+                    show_anonymous,
+                    show_rev_ts,
+                    get_datastore,
+                )
 
-                        metric.change(
-                            update_doc_metric,
-                            [
-                                metric,
-                                domains,
-                                langs,
-                                doc_models_rerank,
-                                doc_search_bar_rerank,
-                                show_anonymous,
-                                show_rev_ts,
-                            ],
-                            doc_df_elem_rerank,
-                            queue=True,
-                        )
+                doc_version_outputs = [
+                    domains,
+                    langs,
+                    models,
+                    doc_df_elem_ret_rerank,
+                    doc_df_elem_ret,
+                    doc_df_elem_rerank,
+                ]
+
+            # switching the version updates all the components above in a single event
+            gr.on([version.change, demo.load], update_version, version, qa_version_outputs + doc_version_outputs)
 
         with gr.TabItem("🚀Submit here!", elem_id="submit-tab-table", id=2):
             with gr.Column():
@@ -645,12 +411,29 @@ with demo:
                     submit_button = gr.Button("Submit")
                 with gr.Row():
                     submission_result = gr.Markdown()
+                with gr.Row():
+                    submission_ticket = gr.Textbox(label="Submission Ticket", info="Check the status of an upload")
+                    status_button = gr.Button("Check Status")
+                with gr.Row():
+                    submission_status = gr.Markdown()
                 upload_button.upload(
                     upload_file,
                     [
                         upload_button,
                     ],
                     file_output,
+                ).then(
+                    check_submission,
+                    [file_output, benchmark_version],
+                    submission_result,
+                    show_progress="hidden",
+                )
+                # the datasets are compared with the selected version
+                benchmark_version.change(
+                    check_submission,
+                    [file_output, benchmark_version],
+                    submission_result,
+                    show_progress="hidden",
                 )
                 submit_button.click(
                     submit_results,
@@ -666,6 +449,12 @@ with demo:
                     submission_result,
                     show_progress="hidden",
                 )
+                status_button.click(
+                    get_submission_status,
+                    submission_ticket,
+                    submission_status,
+                    show_progress="hidden",
+                )
 
         with gr.TabItem("📝 About", elem_id="llm-benchmark-tab-table", id=3):
             gr.Markdown(BENCHMARKS_TEXT, elem_classes="markdown-text")
@@ -675,7 +464,7 @@ with demo:
 
 if __name__ == "__main__":
     scheduler = BackgroundScheduler()
-    scheduler.add_job(restart_space, "interval", seconds=1800)
+    scheduler.add_job(refresh_data, "interval", seconds=1800)
     scheduler.start()
     demo.queue(default_concurrency_limit=40)
     demo.launch()
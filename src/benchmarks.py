@@ -1,7 +1,8 @@
+import threading
+from collections.abc import Mapping
 from dataclasses import dataclass
 from enum import Enum
-
-from air_benchmark.tasks.tasks import BenchmarkTable
+from functools import lru_cache
 
 from src.envs import BENCHMARK_VERSION_LIST, METRIC_LIST
 from src.models import TaskType, get_safe_name
@@ -17,8 +18,42 @@ class Benchmark:
     task: str
 
 
+@dataclass(frozen=True)
+class ColumnSelectionIndex:
+    """
+    Positions of the benchmark columns of each domain and language, stored as bitsets over `cols`
+    """
+
+    cols: tuple  # benchmark column names in the display order
+    domain_bits: dict  # domain -> bitset of the column positions
+    lang_bits: dict  # language -> bitset of the column positions
+
+    @classmethod
+    def from_benchmarks(cls, benchmarks):
+        cols = []
+        domain_bits = {}
+        lang_bits = {}
+        for i, b in enumerate(list(benchmarks.value)):
+            cols.append(b.value.col_name)
+            domain_bits[b.value.domain] = domain_bits.get(b.value.domain, 0) | (1 << i)
+            lang_bits[b.value.lang] = lang_bits.get(b.value.lang, 0) | (1 << i)
+        return cls(tuple(cols), domain_bits, lang_bits)
+
+    def select(self, domains: list, languages: list) -> list:
+        domain_bits = 0
+        for domain in domains:
+            domain_bits |= self.domain_bits.get(domain, 0)
+        lang_bits = 0
+        for lang in languages:
+            lang_bits |= self.lang_bits.get(lang, 0)
+        bits = domain_bits & lang_bits
+        return [c for i, c in enumerate(self.cols) if bits >> i & 1]
+
+
 # create a function return an enum class containing all the benchmarks
 def get_qa_benchmarks_dict(version: str):
+    from air_benchmark.tasks.tasks import BenchmarkTable
+
     benchmark_dict = {}
     for task, domain_dict in BenchmarkTable[version].items():
         if task != TaskType.qa.value:
@@ -35,6 +70,8 @@ def get_qa_benchmarks_dict(version: str):
 
 
 def get_doc_benchmarks_dict(version: str):
+    from air_benchmark.tasks.tasks import BenchmarkTable
+
     benchmark_dict = {}
     for task, domain_dict in BenchmarkTable[version].items():
         if task != TaskType.long_doc.value:
@@ -54,18 +91,99 @@ def get_doc_benchmarks_dict(version: str):
     return benchmark_dict
 
 
-_qa_benchmark_dict = {}
-for version in BENCHMARK_VERSION_LIST:
-    safe_version_name = get_safe_name(version)
-    _qa_benchmark_dict[safe_version_name] = Enum(f"QABenchmarks_{safe_version_name}", get_qa_benchmarks_dict(version))
+@lru_cache(maxsize=None)
+def get_search_result_files(version: str) -> frozenset:
+    """
+    Search result files expected in a submission of the version, as (task, domain, file name) tuples
+    """
+    from air_benchmark.tasks.tasks import BenchmarkTable
+
+    files = set()
+    for task, domain_dict in BenchmarkTable[version].items():
+        for domain, lang_dict in domain_dict.items():
+            for lang, dataset_list in lang_dict.items():
+                for dataset in dataset_list:
+                    if "test" not in dataset_list[dataset]["splits"]:
+                        continue
+                    files.add((task, domain, f"{lang}_{dataset}_test.json"))
+    return frozenset(files)
+
+
+class BenchmarkVersion:
+    """
+    The benchmarks of a version, the enum of the benchmarks is built on first access
+    """
+
+    def __init__(self, name: str, version: str, enum_name: str, get_benchmarks_dict):
+        self.name = name  # version slug
+        self.version = version
+        self._enum_name = enum_name
+        self._get_benchmarks_dict = get_benchmarks_dict
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = Enum(self._enum_name, self._get_benchmarks_dict(self.version))
+        return self._value
+
+    def __repr__(self):
+        return f"<{self._enum_name}>"
+
+
+class BenchmarkVersions:
+    """
+    Enum-like collection of the benchmark versions, keyed by the version slug
+    """
+
+    def __init__(self, name: str, get_benchmarks_dict):
+        self._members = {}
+        for version in BENCHMARK_VERSION_LIST:
+            safe_version_name = get_safe_name(version)
+            self._members[safe_version_name] = BenchmarkVersion(
+                safe_version_name, version, f"{name}_{safe_version_name}", get_benchmarks_dict
+            )
+
+    def __getitem__(self, version_slug: str) -> BenchmarkVersion:
+        return self._members[version_slug]
+
+    def __iter__(self):
+        return iter(self._members.values())
+
+    def __len__(self):
+        return len(self._members)
+
+
+class ColumnIndexes(Mapping):
+    """
+    Column selection indices keyed by the version slug, each one is built on first access
+    """
+
+    def __init__(self, benchmarks: BenchmarkVersions):
+        self._benchmarks = benchmarks
+        self._indexes = {}
+
+    def __getitem__(self, version_slug: str) -> ColumnSelectionIndex:
+        index = self._indexes.get(version_slug)
+        if index is None:
+            index = ColumnSelectionIndex.from_benchmarks(self._benchmarks[version_slug])
+            self._indexes[version_slug] = index
+        return index
+
+    def __iter__(self):
+        return (b.name for b in self._benchmarks)
+
+    def __len__(self):
+        return len(self._benchmarks)
 
-_doc_benchmark_dict = {}
-for version in BENCHMARK_VERSION_LIST:
-    safe_version_name = get_safe_name(version)
-    _doc_benchmark_dict[safe_version_name] = Enum(
-        f"LongDocBenchmarks_{safe_version_name}", get_doc_benchmarks_dict(version)
-    )
 
+# the benchmark tables of air_benchmark are only read when a version is first used
+QABenchmarks = BenchmarkVersions("QABenchmarks", get_qa_benchmarks_dict)
+LongDocBenchmarks = BenchmarkVersions("LongDocBenchmarks", get_doc_benchmarks_dict)
 
-QABenchmarks = Enum("QABenchmarks", _qa_benchmark_dict)
-LongDocBenchmarks = Enum("LongDocBenchmarks", _doc_benchmark_dict)
+# column selection indices for the domain and language filters, keyed by the version slug
+QAColumnIndex = ColumnIndexes(QABenchmarks)
+LongDocColumnIndex = ColumnIndexes(LongDocBenchmarks)
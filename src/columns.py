@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field, make_dataclass
+from functools import lru_cache
 
 
 # These classes are for user facing column names,
@@ -13,6 +14,29 @@ class ColumnContent:
     never_hidden: bool = False
 
 
+@dataclass(frozen=True)
+class ColumnSchema:
+    """
+    Immutable names and types of the columns of a leaderboard table, in the display order
+    """
+
+    names: tuple
+    types: tuple
+    hidden: tuple  # whether each column is hidden
+    displayed_names: tuple  # names of the columns that are not hidden
+    displayed_types: tuple
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(
+            names=tuple(c.name for c in columns),
+            types=tuple(c.type for c in columns),
+            hidden=tuple(c.hidden for c in columns),
+            displayed_names=tuple(c.name for c in columns if not c.hidden),
+            displayed_types=tuple(c.type for c in columns if not c.hidden),
+        )
+
+
 def get_default_auto_eval_column_dict():
     auto_eval_column_dict = []
     auto_eval_column_dict.append(
@@ -87,21 +111,32 @@ def make_autoevalcolumn(cls_name, benchmarks):
     return make_dataclass(cls_name, auto_eval_column_dict, frozen=True)
 
 
-def get_default_col_names_and_types(benchmarks):
+@lru_cache(maxsize=None)
+def get_column_schema(benchmarks) -> ColumnSchema:
+    """
+    Get the column schema of the benchmarks, built once for each benchmark enum
+    """
     AutoEvalColumn = make_autoevalcolumn("AutoEvalColumn", benchmarks)
-    col_names = []
-    col_types = []
-    for f in AutoEvalColumn.__dataclass_fields__.values():
-        col = f.default_factory()
-        if not col.hidden:
-            col_names.append(col.name)
-            col_types.append(col.type)
-    return col_names, col_types
+    return ColumnSchema.from_columns([f.default_factory() for f in AutoEvalColumn.__dataclass_fields__.values()])
 
 
-def get_fixed_col_names_and_types():
+@lru_cache(maxsize=None)
+def get_fixed_column_schema() -> ColumnSchema:
+    """
+    Get the schema of the columns shown in front of the benchmark columns in every table
+    """
     fixed_cols = get_default_auto_eval_column_dict()[:-3]
-    return [c.default_factory().name for _, _, c in fixed_cols], [c.default_factory().type for _, _, c in fixed_cols]
+    return ColumnSchema.from_columns([c.default_factory() for _, _, c in fixed_cols])
+
+
+def get_default_col_names_and_types(benchmarks):
+    schema = get_column_schema(benchmarks)
+    return schema.displayed_names, schema.displayed_types
+
+
+def get_fixed_col_names_and_types():
+    schema = get_fixed_column_schema()
+    return schema.names, schema.types
 
 
 COL_NAME_AVG = "Average ⬆️"
@@ -109,6 +144,8 @@ COL_NAME_RETRIEVAL_MODEL = "Retrieval Method"
 COL_NAME_RERANKING_MODEL = "Reranking Model"
 COL_NAME_RETRIEVAL_MODEL_LINK = "Retrieval Model LINK"
 COL_NAME_RERANKING_MODEL_LINK = "Reranking Model LINK"
+COL_NAME_RETRIEVAL_MODEL_NAME = "Retrieval Model NAME"  # plain-text names without the hyperlinks
+COL_NAME_RERANKING_MODEL_NAME = "Reranking Model NAME"
 COL_NAME_RANK = "Rank 🏆"
 COL_NAME_REVISION = "Revision"
 COL_NAME_TIMESTAMP = "Submission Date"
@@ -1,7 +1,5 @@
 import os
 
-from huggingface_hub import HfApi
-
 # Info to change for your repository
 # ----------------------------------
 TOKEN = os.environ.get("TOKEN", "")  # A read/write token for your org
@@ -22,8 +20,26 @@ CACHE_PATH = os.getenv("HF_HOME", ".")
 
 # Local caches
 EVAL_RESULTS_PATH = os.path.join(CACHE_PATH, "eval_results")
+# parsed scores of the eval results, one npz file for each version
+SCORE_CACHE_PATH = os.path.join(CACHE_PATH, "score_cache")
+
+# Set to profile the import time of each module at startup
+PROFILE_STARTUP = bool(os.environ.get("PROFILE_STARTUP", ""))
 
-API = HfApi(token=TOKEN)
+# Number of processes for parsing the result files, 1 for loading them one after another
+NUM_LOADING_WORKERS = int(os.environ.get("NUM_LOADING_WORKERS", 1))
+# Set to parse the result files straight into the scores, without keeping the parsed results
+STREAMING_PARSE = bool(os.environ.get("STREAMING_PARSE", ""))
+# Set to parse the whole result files with orjson when it is installed, used when STREAMING_PARSE is not set
+ORJSON_PARSE = bool(os.environ.get("ORJSON_PARSE", ""))
+# Number of threads for downloading the result files
+NUM_DOWNLOAD_WORKERS = int(os.environ.get("NUM_DOWNLOAD_WORKERS", 8))
+# Number of threads for uploading the submissions in the background
+NUM_UPLOAD_WORKERS = int(os.environ.get("NUM_UPLOAD_WORKERS", 2))
+# Number of submission tickets kept for the status checks, the oldest finished uploads are dropped first
+MAX_SUBMISSION_TICKETS = int(os.environ.get("MAX_SUBMISSION_TICKETS", 1024))
+# Number of leaderboard dataframes kept in memory, one for each (version, task, metric)
+LEADERBOARD_DF_CACHE_SIZE = int(os.environ.get("LEADERBOARD_DF_CACHE_SIZE", 128))
 
 BENCHMARK_VERSION_LIST = [
     "AIR-Bench_24.04",
@@ -72,3 +88,13 @@ SKIP_SUBMISSIONS = [
     "AIR-Bench_24.05/bge-m3/NoReranker/results.json",
     "AIR-Bench_24.05/bge-m3/NoReranker/results_20241201071239-70de025455132e3b6d6a7786130cf91f.json"
 ]
+
+
+def __getattr__(name):
+    # the hub client is created on first use, importing huggingface_hub is slow
+    if name == "API":
+        from huggingface_hub import HfApi
+
+        globals()["API"] = HfApi(token=TOKEN)
+        return globals()["API"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
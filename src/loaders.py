@@ -1,20 +1,77 @@
 import os.path
+import threading
+import zipfile
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
-from src.columns import COL_NAME_IS_ANONYMOUS, COL_NAME_REVISION, COL_NAME_TIMESTAMP
-from src.envs import BENCHMARK_VERSION_LIST, DEFAULT_METRIC_LONG_DOC, DEFAULT_METRIC_QA, SKIP_SUBMISSIONS
-from src.models import FullEvalResult, LeaderboardDataStore, TaskType, get_safe_name
-from src.utils import get_default_cols, get_leaderboard_df, reset_rank
+from src.columns import COL_NAME_IS_ANONYMOUS, COL_NAME_RERANKING_MODEL_NAME, COL_NAME_REVISION, COL_NAME_TIMESTAMP
+from src.envs import (
+    BENCHMARK_VERSION_LIST,
+    DEFAULT_METRIC_LONG_DOC,
+    DEFAULT_METRIC_QA,
+    LATEST_BENCHMARK_VERSION,
+    METRIC_LIST,
+    NUM_LOADING_WORKERS,
+    ORJSON_PARSE,
+    SKIP_SUBMISSIONS,
+    STREAMING_PARSE,
+)
+from src.models import FullEvalResult, LeaderboardDataStore, TaskType, get_safe_name, load_scores_from_json_file
+from src.utils import (
+    LEADERBOARD_DF_CACHE,
+    META_COLS,
+    build_leaderboard_views,
+    get_benchmark_cols,
+    get_default_cols,
+    reset_rank,
+)
 
 pd.options.mode.copy_on_write = True
 
+# bump the version when the layout of the score cache changes
+SCORE_CACHE_FORMAT_VERSION = 2
 
-def load_raw_eval_results(results_path: Union[Path, str]) -> List[FullEvalResult]:
+
+def _load_result_file(model_result_filepath: str, parse_fn: Callable):
+    # parse a result file, the broken files are skipped with None
+    try:
+        result = parse_fn(model_result_filepath)
+    except UnicodeDecodeError:
+        print(f"loading file failed since UnicodeDecodeError. {model_result_filepath}")
+        return None
+    except IndexError:
+        print(f"loading file failed since IndexError. {model_result_filepath}")
+        return None
+    except KeyError:
+        # the results are validated while they are parsed
+        print(f"loading failed: {model_result_filepath}")
+        return None
+    print(f"file loaded: {model_result_filepath}")
+    return result
+
+
+def _load_result_files(model_result_filepaths: List[str], parse_fn: Callable, num_workers: int) -> list:
     """
-    Load the evaluation results from a json file
+    Parse the result files with `parse_fn`, in a process pool when `num_workers` is larger than 1.
+    The broken files are None in the returned list.
+    """
+    load_fn = partial(_load_result_file, parse_fn=parse_fn)
+    if num_workers > 1 and len(model_result_filepaths) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            # map keeps the order of the files so that the results are the same as the serial loading
+            return list(executor.map(load_fn, model_result_filepaths))
+    return [load_fn(fp) for fp in model_result_filepaths]
+
+
+def get_result_filepaths(results_path: Union[Path, str]) -> List[str]:
+    """
+    Get the paths of the result json files to load, except for the skipped submissions
     """
     model_result_filepaths = []
     for root, dirs, files in os.walk(results_path):
@@ -32,39 +89,231 @@ def load_raw_eval_results(results_path: Union[Path, str]) -> List[FullEvalResult
                 print(f"skip {filepath}")
                 continue
             model_result_filepaths.append(filepath)
+    return model_result_filepaths
+
+
+def load_raw_eval_results(
+    results_path: Union[Path, str], num_workers: int = NUM_LOADING_WORKERS
+) -> List[FullEvalResult]:
+    """
+    Load the evaluation results from a json file
+    The json files are parsed with a process pool when `num_workers` is larger than 1.
+    The results are validated while they are parsed, the broken files are skipped.
+    The app does not keep the evaluation results, it loads the scores with `load_cached_score_store` instead.
+    """
+    model_result_filepaths = get_result_filepaths(results_path)
 
     eval_results = {}
-    for model_result_filepath in model_result_filepaths:
-        # create evaluation results
-        try:
-            eval_result = FullEvalResult.init_from_json_file(model_result_filepath)
-        except UnicodeDecodeError:
-            print(f"loading file failed since UnicodeDecodeError. {model_result_filepath}")
-            continue
-        except IndexError:
-            print(f"loading file failed since IndexError. {model_result_filepath}")
+    for eval_result in _load_result_files(model_result_filepaths, FullEvalResult.init_from_json_file, num_workers):
+        if eval_result is None:
             continue
-        print(f"file loaded: {model_result_filepath}")
         timestamp = eval_result.timestamp
         eval_results[timestamp] = eval_result
+    return list(eval_results.values())
+
+
+def get_file_fingerprint(filepath: str) -> Tuple[int, int]:
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def get_result_fingerprints(results_path: Union[Path, str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Get the size and modification time of the result json files, keyed by their paths relative to `results_path`
+    """
+    return {os.path.relpath(fp, results_path): get_file_fingerprint(fp) for fp in get_result_filepaths(results_path)}
+
+
+def read_score_cache(cache_filepath: Union[Path, str], benchmark_cols: dict) -> Optional[Dict]:
+    """
+    Read the cached scores of a version. Return None when the cache is missing or outdated.
+    """
+    if not os.path.exists(cache_filepath):
+        return None
+    try:
+        with np.load(cache_filepath, allow_pickle=False) as data:
+            cache = {k: data[k] for k in data.files}
+        # the layout of the tensor changes with the benchmarks and metrics
+        if int(cache["format_version"]) != SCORE_CACHE_FORMAT_VERSION:
+            return None
+        if cache["tasks"].tolist() != list(benchmark_cols) or cache["metrics"].tolist() != METRIC_LIST:
+            return None
+        for i, cols in enumerate(benchmark_cols.values()):
+            if cache[f"benchmark_cols_{i}"].tolist() != cols:
+                return None
+        if cache["meta_cols"].tolist() != META_COLS:
+            return None
+        required = ["paths", "sizes", "mtimes", "scores", "has_scores"]
+        for i, col in enumerate(META_COLS):
+            required += [f"meta_{i}"] if col == COL_NAME_IS_ANONYMOUS else [f"meta_{i}", f"meta_null_{i}"]
+        missing = [k for k in required if k not in cache]
+        if missing:
+            raise KeyError(f"missing arrays {missing}")
+    except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile) as e:
+        # the cache is only a shortcut, a broken cache is dropped and the result files are parsed again
+        print(f"loading cache failed: {cache_filepath}. {e!r}")
+        return None
+    return cache
+
+
+def read_cached_meta(cache: Dict, col_idx: int, row: int):
+    """
+    Read a submission-level value of a cached row, None for the missing values
+    """
+    is_null = cache.get(f"meta_null_{col_idx}")
+    if is_null is not None and is_null[row]:
+        return None
+    return cache[f"meta_{col_idx}"][row].item()
+
+
+def write_score_cache(
+    cache_filepath: Union[Path, str],
+    benchmark_cols: dict,
+    paths: List[str],
+    fingerprints: List[Tuple[int, int]],
+    meta_df: pd.DataFrame,
+    scores: np.ndarray,
+    has_scores: np.ndarray,
+):
+    """
+    Write the scores of a version into a single npz file, one row for each result file
+    """
+    os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+    arrays = {
+        "format_version": np.array(SCORE_CACHE_FORMAT_VERSION),
+        "tasks": np.array(list(benchmark_cols), dtype=str),
+        "metrics": np.array(METRIC_LIST, dtype=str),
+        "meta_cols": np.array(META_COLS, dtype=str),
+        "paths": np.array(paths, dtype=str),
+        "sizes": np.array([fp[0] for fp in fingerprints], dtype=np.int64),
+        "mtimes": np.array([fp[1] for fp in fingerprints], dtype=np.int64),
+        "scores": scores,
+        "has_scores": has_scores,
+    }
+    for i, cols in enumerate(benchmark_cols.values()):
+        arrays[f"benchmark_cols_{i}"] = np.array(cols, dtype=str)
+    for i, col in enumerate(META_COLS):
+        if col == COL_NAME_IS_ANONYMOUS:
+            arrays[f"meta_{i}"] = meta_df[col].to_numpy(dtype=bool)
+            continue
+        # the strings are stored with a fixed width and without the missing values, which are kept in a mask
+        arrays[f"meta_{i}"] = np.array(meta_df[col].fillna("").astype(str).tolist(), dtype=str)
+        arrays[f"meta_null_{i}"] = meta_df[col].isna().to_numpy(dtype=bool)
+    # write to a temporary file first so that a crash never leaves a broken cache behind
+    tmp_filepath = f"{cache_filepath}.tmp"
+    with open(tmp_filepath, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_filepath, cache_filepath)
+
+
+def load_cached_score_store(
+    ds: LeaderboardDataStore,
+    results_path: Union[Path, str],
+    cache_path: Optional[Union[Path, str]],
+    num_workers: int = NUM_LOADING_WORKERS,
+    streaming: bool = STREAMING_PARSE,
+    use_orjson: bool = ORJSON_PARSE,
+) -> LeaderboardDataStore:
+    """
+    Fill the score tensor of the datastore from the cache of the version.
+    Only the result files that are new or changed since the cache was written are parsed.
+    Without `cache_path`, all the result files are parsed and no cache is written.
+    The result files are parsed and validated straight into the scores, see `load_scores_from_json_file`.
+    """
+    benchmark_cols = get_benchmark_cols(ds.slug)
+    cache_filepath = None
+    cache = None
+    if cache_path is not None:
+        cache_filepath = os.path.join(cache_path, f"{ds.slug}.npz")
+        cache = read_score_cache(cache_filepath, benchmark_cols)
+    cached_rows = {}
+    if cache is not None:
+        for i, (path, size, mtime) in enumerate(zip(cache["paths"].tolist(), cache["sizes"], cache["mtimes"])):
+            cached_rows[path] = ((int(size), int(mtime)), i)
+
+    model_result_filepaths = get_result_filepaths(results_path)
+    paths = [os.path.relpath(fp, results_path) for fp in model_result_filepaths]
+    fingerprints = [get_file_fingerprint(fp) for fp in model_result_filepaths]
+    ds.fingerprints = dict(zip(paths, fingerprints))
+    changed = [
+        i
+        for i, (path, fingerprint) in enumerate(zip(paths, fingerprints))
+        if path not in cached_rows or cached_rows[path][0] != fingerprint
+    ]
+    print(f"cached result files: {len(paths) - len(changed)}, changed result files: {len(changed)}")
 
-    results = []
-    for k, v in eval_results.items():
-        try:
-            v.to_dict()
-            results.append(v)
-        except KeyError:
-            print(f"loading failed: {k}")
+    # parse the new and changed files
+    parsed = {}
+    parse_fn = partial(
+        load_scores_from_json_file,
+        benchmark_cols=benchmark_cols,
+        metrics=METRIC_LIST,
+        streaming=streaming,
+        use_orjson=use_orjson,
+    )
+    rows = _load_result_files([model_result_filepaths[i] for i in changed], parse_fn, num_workers)
+    for i, row in zip(changed, rows):
+        if row is not None:
+            parsed[i] = row
+
+    # collect one row for each loaded file
+    changed_set = frozenset(changed)
+    file_rows = []
+    for i, path in enumerate(paths):
+        if i in parsed:
+            meta, scores, has_scores = parsed[i]
+        elif i not in changed_set:
+            row = cached_rows[path][1]
+            meta = {col: read_cached_meta(cache, j, row) for j, col in enumerate(META_COLS)}
+            scores, has_scores = cache["scores"][row], cache["has_scores"][row]
+        else:
             continue
-    return results
+        file_rows.append((i, meta, scores, has_scores))
+
+    num_benchmarks = max([len(cols) for cols in benchmark_cols.values()])
+    file_scores = np.full((len(file_rows), len(benchmark_cols), len(METRIC_LIST), num_benchmarks), np.nan)
+    file_has_scores = np.zeros(file_scores.shape[:-1], dtype=bool)
+    for j, (_, _, scores, has_scores) in enumerate(file_rows):
+        file_scores[j], file_has_scores[j] = scores, has_scores
+    file_meta_df = pd.DataFrame.from_records([meta for _, meta, _, _ in file_rows], columns=META_COLS)
+    if cache_filepath is not None and (changed or len(cached_rows) != len(paths)):
+        write_score_cache(
+            cache_filepath,
+            benchmark_cols,
+            [paths[i] for i, _, _, _ in file_rows],
+            [fingerprints[i] for i, _, _, _ in file_rows],
+            file_meta_df,
+            file_scores,
+            file_has_scores,
+        )
+        print(f"score cache updated: {cache_filepath}")
+
+    # the later files override the earlier ones with the same timestamp
+    latest_rows = {}
+    for j, timestamp in enumerate(file_meta_df[COL_NAME_TIMESTAMP]):
+        latest_rows[timestamp] = j
+    rows = list(latest_rows.values())
+    ds.meta_df = file_meta_df.iloc[rows].reset_index(drop=True)
+    ds.scores = file_scores[rows]
+    ds.has_scores = file_has_scores[rows]
+    ds.benchmark_cols = benchmark_cols
+    return ds
 
 
-def load_leaderboard_datastore(file_path, version) -> LeaderboardDataStore:
+def load_leaderboard_datastore(
+    file_path,
+    version,
+    num_workers: int = NUM_LOADING_WORKERS,
+    cache_path: Optional[Union[Path, str]] = None,
+    streaming: bool = STREAMING_PARSE,
+    use_orjson: bool = ORJSON_PARSE,
+) -> LeaderboardDataStore:
     ds = LeaderboardDataStore(version, get_safe_name(version))
-    ds.raw_data = load_raw_eval_results(file_path)
-    print(f"raw data: {len(ds.raw_data)}")
+    # validate the results and fill the scores in a single pass over the result files
+    load_cached_score_store(ds, file_path, cache_path, num_workers, streaming, use_orjson)
+    print(f"raw data: {len(ds.meta_df)}")
 
-    ds.qa_raw_df = get_leaderboard_df(ds, TaskType.qa, DEFAULT_METRIC_QA)
+    ds.qa_raw_df = LEADERBOARD_DF_CACHE.get(ds, TaskType.qa, DEFAULT_METRIC_QA)
     print(f"QA data loaded: {ds.qa_raw_df.shape}")
     ds.qa_fmt_df = ds.qa_raw_df.copy()
     qa_cols, ds.qa_types = get_default_cols(TaskType.qa, ds.slug, add_fix_cols=True)
@@ -74,7 +323,7 @@ def load_leaderboard_datastore(file_path, version) -> LeaderboardDataStore:
     ds.qa_fmt_df = reset_rank(ds.qa_fmt_df)
     ds.qa_fmt_df.drop([COL_NAME_REVISION, COL_NAME_TIMESTAMP], axis=1, inplace=True)
 
-    ds.doc_raw_df = get_leaderboard_df(ds, TaskType.long_doc, DEFAULT_METRIC_LONG_DOC)
+    ds.doc_raw_df = LEADERBOARD_DF_CACHE.get(ds, TaskType.long_doc, DEFAULT_METRIC_LONG_DOC)
     print(f"Long-Doc data loaded: {len(ds.doc_raw_df)}")
     ds.doc_fmt_df = ds.doc_raw_df.copy()
     doc_cols, ds.doc_types = get_default_cols(TaskType.long_doc, ds.slug, add_fix_cols=True)
@@ -84,13 +333,114 @@ def load_leaderboard_datastore(file_path, version) -> LeaderboardDataStore:
     ds.doc_fmt_df = reset_rank(ds.doc_fmt_df)
     ds.doc_fmt_df.drop([COL_NAME_REVISION, COL_NAME_TIMESTAMP], axis=1, inplace=True)
 
-    ds.reranking_models = sorted(list(frozenset([eval_result.reranking_model for eval_result in ds.raw_data])))
+    ds.reranking_models = sorted(list(frozenset(ds.meta_df[COL_NAME_RERANKING_MODEL_NAME])))
+
+    # the frames of the Retrieval Only and Reranking Only tabs
+    build_leaderboard_views(ds)
     return ds
 
 
-def load_eval_results(file_path: Union[str, Path]) -> Dict[str, LeaderboardDataStore]:
+class LazyDatastoreDict(Mapping):
+    """
+    Datastores keyed by the version, each one is loaded on first access or by `preload`.
+    A version is loaded only once even when it is requested by several threads at the same time.
+    """
+
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        num_workers: int = NUM_LOADING_WORKERS,
+        cache_path: Optional[Union[Path, str]] = None,
+        versions: List[str] = BENCHMARK_VERSION_LIST,
+    ):
+        self.file_path = file_path
+        self.num_workers = num_workers
+        self.cache_path = cache_path
+        self.versions = list(versions)
+        self._datastores = {}
+        self._locks = {version: threading.Lock() for version in self.versions}
+
+    def __getitem__(self, version: str) -> LeaderboardDataStore:
+        ds = self._datastores.get(version)
+        if ds is not None:
+            return ds
+        with self._locks[version]:
+            # the version might have been loaded while waiting for the lock
+            if version not in self._datastores:
+                fn = f"{self.file_path}/{version}"
+                self._datastores[version] = load_leaderboard_datastore(fn, version, self.num_workers, self.cache_path)
+            return self._datastores[version]
+
+    def __setitem__(self, version: str, ds: LeaderboardDataStore):
+        self._datastores[version] = ds
+
+    def __contains__(self, version) -> bool:
+        return version in self._locks
+
+    def __iter__(self):
+        return iter(self.versions)
+
+    def __len__(self):
+        return len(self.versions)
+
+    def loaded(self) -> Dict[str, LeaderboardDataStore]:
+        return {version: self._datastores[version] for version in self.versions if version in self._datastores}
+
+    def preload(self, background: bool = True) -> Optional[threading.Thread]:
+        def _load_all():
+            for version in self.versions:
+                self[version]
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="preload-datastores", daemon=True)
+        thread.start()
+        return thread
+
+
+def load_eval_results(
+    file_path: Union[str, Path],
+    num_workers: int = NUM_LOADING_WORKERS,
+    cache_path: Optional[Union[Path, str]] = None,
+    lazy: bool = False,
+) -> Dict[str, LeaderboardDataStore]:
+    """
+    Load the datastores of all the versions. With `lazy`, only the latest version is loaded,
+    the others are loaded on first access.
+    """
+    if lazy:
+        output = LazyDatastoreDict(file_path, num_workers, cache_path)
+        output[LATEST_BENCHMARK_VERSION]
+        return output
     output = {}
     for version in BENCHMARK_VERSION_LIST:
         fn = f"{file_path}/{version}"
-        output[version] = load_leaderboard_datastore(fn, version)
+        output[version] = load_leaderboard_datastore(fn, version, num_workers, cache_path)
     return output
+
+
+def refresh_eval_results(
+    file_path: Union[str, Path],
+    ds_dict: Dict[str, LeaderboardDataStore],
+    num_workers: int = NUM_LOADING_WORKERS,
+    cache_path: Optional[Union[Path, str]] = None,
+) -> List[str]:
+    """
+    Reload the versions in `ds_dict` whose result files have changed, and swap in the new datastores.
+    The datastores in use are never modified, so the requests being served keep reading consistent data.
+    With `cache_path`, only the new and modified result files are parsed.
+    Return the refreshed versions.
+    """
+    refreshed = []
+    # the versions that are not loaded yet will read the latest files on first access
+    datastores = ds_dict.loaded() if isinstance(ds_dict, LazyDatastoreDict) else dict(ds_dict)
+    for version, ds in datastores.items():
+        fn = f"{file_path}/{version}"
+        if ds.fingerprints == get_result_fingerprints(fn):
+            continue
+        ds_dict[version] = load_leaderboard_datastore(fn, version, num_workers, cache_path)
+        LEADERBOARD_DF_CACHE.invalidate(ds_dict[version])
+        print(f"data version refreshed: {version}")
+        refreshed.append(version)
+    return refreshed
@@ -1,23 +1,100 @@
+import itertools
 import json
+import re
+import threading
+from array import array
 from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from src.columns import (
     COL_NAME_IS_ANONYMOUS,
     COL_NAME_RERANKING_MODEL,
     COL_NAME_RERANKING_MODEL_LINK,
+    COL_NAME_RERANKING_MODEL_NAME,
     COL_NAME_RETRIEVAL_MODEL,
     COL_NAME_RETRIEVAL_MODEL_LINK,
+    COL_NAME_RETRIEVAL_MODEL_NAME,
     COL_NAME_REVISION,
     COL_NAME_TIMESTAMP,
 )
 
 
-@dataclass
+class BenchmarkResults:
+    """
+    Results on the benchmarks stored as parallel arrays: the codes of the interned (domain, lang, dataset) keys
+    and the values. Iterating over it yields the result dicts of the json file.
+    This is the offline representation of the result files, read by `load_raw_eval_results` in the tests and scripts.
+    The app fills the scores of `LeaderboardDataStore` straight from the files, see `load_scores_from_json_file`.
+    """
+
+    __slots__ = ("codes", "values")
+
+    # (domain, lang, dataset) keys shared by all the results of the process
+    _keys = []
+    _key_codes = {}
+    _lock = threading.Lock()
+
+    def __init__(self, codes: array = None, values: array = None):
+        self.codes = array("I") if codes is None else codes
+        self.values = array("d") if values is None else values
+
+    @classmethod
+    def get_code(cls, key: tuple) -> int:
+        code = cls._key_codes.get(key)
+        if code is None:
+            with cls._lock:
+                code = cls._key_codes.get(key)
+                if code is None:
+                    code = len(cls._keys)
+                    cls._keys.append(key)
+                    cls._key_codes[key] = code
+        return code
+
+    @classmethod
+    def from_keys(cls, keys, values):
+        key_codes = cls._key_codes
+        codes = [key_codes[key] if key in key_codes else cls.get_code(key) for key in keys]
+        return cls(array("I", codes), array("d", values))
+
+    @classmethod
+    def from_list(cls, results: list):
+        return cls.from_keys([(r["domain"], r["lang"], r["dataset"]) for r in results], [r["value"] for r in results])
+
+    def keys(self) -> list:
+        return [self._keys[code] for code in self.codes]
+
+    def items(self):
+        return zip(self.keys(), self.values)
+
+    def __iter__(self):
+        for (domain, lang, dataset), value in self.items():
+            yield {"domain": domain, "lang": lang, "dataset": dataset, "value": value}
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, BenchmarkResults):
+            return NotImplemented
+        return self.keys() == other.keys() and self.values == other.values
+
+    def __reduce__(self):
+        # the codes are only valid in this process, so the keys are pickled for the process pool
+        return BenchmarkResults.from_keys, (self.keys(), self.values)
+
+
+@dataclass(slots=True)
 class EvalResult:
     """
     Evaluation result of a single embedding model with a specific reranking model on benchmarks over different
@@ -27,13 +104,31 @@ class EvalResult:
     eval_name: str  # name of the evaluation, [retrieval_model]_[reranking_model]_[metric]
     retrieval_model: str
     reranking_model: str
-    results: list  # results on all the benchmarks stored as dict
+    results: BenchmarkResults  # results on all the benchmarks, a list of result dicts is converted on init
     task: str
     metric: str
     timestamp: str = ""  # submission timestamp
     revision: str = ""
     is_anonymous: bool = False
 
+    def __post_init__(self):
+        if not isinstance(self.results, BenchmarkResults):
+            self.results = BenchmarkResults.from_list(self.results)
+
+    @classmethod
+    def from_config(cls, config: dict, results: list):
+        return cls(
+            eval_name=f"{config['retrieval_model']}_{config['reranking_model']}_{config['metric']}",
+            retrieval_model=config["retrieval_model"],
+            reranking_model=config["reranking_model"],
+            results=results,
+            task=config["task"],
+            metric=config["metric"],
+            timestamp=config.get("timestamp", "2024-05-12T12:24:02Z"),
+            revision=config.get("revision", "3a2ba9dcad796a48a02ca1147557724e"),
+            is_anonymous=config.get("is_anonymous", False),
+        )
+
 
 @dataclass
 class FullEvalResult:
@@ -68,23 +163,13 @@ class FullEvalResult:
             config = item.get("config", {})
             # eval results for different metrics
             results = item.get("results", [])
-            retrieval_model_link = config["retrieval_model_link"]
-            if config["reranking_model_link"] is None:
-                reranking_model_link = ""
-            else:
-                reranking_model_link = config["reranking_model_link"]
-            eval_result = EvalResult(
-                eval_name=f"{config['retrieval_model']}_{config['reranking_model']}_{config['metric']}",
-                retrieval_model=config["retrieval_model"],
-                reranking_model=config["reranking_model"],
-                results=results,
-                task=config["task"],
-                metric=config["metric"],
-                timestamp=config.get("timestamp", "2024-05-12T12:24:02Z"),
-                revision=config.get("revision", "3a2ba9dcad796a48a02ca1147557724e"),
-                is_anonymous=config.get("is_anonymous", False),
-            )
+            retrieval_model_link, reranking_model_link = get_model_links(config)
+            eval_result = EvalResult.from_config(config, results)
             result_list.append(eval_result)
+        return cls.from_eval_results(result_list, retrieval_model_link, reranking_model_link)
+
+    @classmethod
+    def from_eval_results(cls, result_list: List[EvalResult], retrieval_model_link: str, reranking_model_link: str):
         eval_result = result_list[0]
         return cls(
             eval_name=f"{eval_result.retrieval_model}_{eval_result.reranking_model}",
@@ -123,25 +208,176 @@ class FullEvalResult:
             results[eval_name][COL_NAME_TIMESTAMP] = self.timestamp
             results[eval_name][COL_NAME_IS_ANONYMOUS] = self.is_anonymous
 
-            for result in eval_result.results:
+            for key, value in eval_result.results.items():
                 # add result for each domain, language, and dataset
-                domain = result["domain"]
-                lang = result["lang"]
-                dataset = result["dataset"]
-                value = result["value"] * 100
-                if dataset == "default":
-                    benchmark_name = f"{domain}_{lang}"
-                else:
-                    benchmark_name = f"{domain}_{lang}_{dataset}"
-                results[eval_name][get_safe_name(benchmark_name)] = value
+                results[eval_name][get_benchmark_col_name(*key)] = value * 100
         return [v for v in results.values()]
 
+    def to_scores(self, benchmark_cols: Dict[str, List[str]], metrics: List[str]) -> tuple:
+        """
+        Convert the results in all the EvalResults into a dense score array of shape (task, metric, benchmark).
+        The tasks follow the order of `benchmark_cols` and the benchmarks follow the order of its column lists.
+        Missing scores are NaN. The returned mask of shape (task, metric) marks the available EvalResults.
+        """
+        writer = ScoreWriter(benchmark_cols, metrics)
+        for eval_result in self.results:
+            writer.write(eval_result.task, eval_result.metric, eval_result.results.items())
+        return writer.scores, writer.has_scores
+
+    def to_meta(self) -> Dict:
+        """
+        Get the submission-level columns shared by all the tasks and metrics
+        """
+        return {
+            COL_NAME_RETRIEVAL_MODEL: make_clickable_model(self.retrieval_model, self.retrieval_model_link),
+            COL_NAME_RERANKING_MODEL: make_clickable_model(self.reranking_model, self.reranking_model_link),
+            COL_NAME_RETRIEVAL_MODEL_LINK: self.retrieval_model_link,
+            COL_NAME_RERANKING_MODEL_LINK: self.reranking_model_link,
+            COL_NAME_RETRIEVAL_MODEL_NAME: self.retrieval_model,
+            COL_NAME_RERANKING_MODEL_NAME: self.reranking_model,
+            COL_NAME_REVISION: self.revision,
+            COL_NAME_TIMESTAMP: self.timestamp,
+            COL_NAME_IS_ANONYMOUS: self.is_anonymous,
+        }
+
+
+@lru_cache(maxsize=None)
+def _get_score_layout(benchmark_cols: tuple, metrics: tuple) -> tuple:
+    """
+    Get the positions along the axes of the score array, shared by the writers of the same layout
+    """
+    task_index = {task: i for i, (task, _) in enumerate(benchmark_cols)}
+    metric_index = {metric: i for i, metric in enumerate(metrics)}
+    col_index = {task: {col: i for i, col in enumerate(cols)} for task, cols in benchmark_cols}
+    # task -> (domain, lang, dataset) -> benchmark position, resolved once for each benchmark
+    positions = {task: {} for task, _ in benchmark_cols}
+    return task_index, metric_index, col_index, positions
+
+
+class ScoreWriter:
+    """
+    Write the results of the EvalResults into a dense score array of shape (task, metric, benchmark)
+    """
+
+    def __init__(self, benchmark_cols: Dict[str, List[str]], metrics: List[str]):
+        layout = _get_score_layout(tuple((task, tuple(cols)) for task, cols in benchmark_cols.items()), tuple(metrics))
+        self.task_index, self.metric_index, self.col_index, self._positions = layout
+        num_benchmarks = max([len(cols) for cols in benchmark_cols.values()], default=0)
+        self.scores = np.full((len(self.task_index), len(self.metric_index), num_benchmarks), np.nan)
+        self.has_scores = np.zeros((len(self.task_index), len(self.metric_index)), dtype=bool)
+
+    def write(self, task: str, metric: str, results):
+        """
+        Write the ((domain, lang, dataset), value) pairs of an EvalResult
+        """
+        if task not in self.task_index or metric not in self.metric_index:
+            return
+        t = self.task_index[task]
+        m = self.metric_index[metric]
+        self.has_scores[t, m] = True
+        col_index = self.col_index[task]
+        positions = self._positions[task]
+        # write into a list first, setting the numpy elements one by one is slow
+        row = self.scores[t, m].tolist()
+        for key, value in results:
+            if key not in positions:
+                positions[key] = col_index.get(get_benchmark_col_name(*key))
+            b = positions[key]
+            if b is None:
+                continue
+            row[b] = value * 100
+        self.scores[t, m] = row
+
+
+@lru_cache(maxsize=None)
+def get_benchmark_col_name(domain: str, lang: str, dataset: str) -> str:
+    if dataset == "default":
+        benchmark_name = f"{domain}_{lang}"
+    else:
+        benchmark_name = f"{domain}_{lang}_{dataset}"
+    return get_safe_name(benchmark_name)
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_items(json_filepath) -> Iterator:
+    """
+    Iterate over the items of the json list in a result file, so that each item can be dropped once it is used.
+    The items are decoded one by one, the parsed tree of the whole file is never built.
+    """
+    with open(json_filepath, "rb") as fp:
+        data = fp.read()
+    text = data.decode("utf-8")
+    del data
+    decoder = json.JSONDecoder()
+    idx = _WHITESPACE.match(text, 0).end()
+    if text[idx : idx + 1] != "[":
+        raise ValueError(f"expecting a json list in {json_filepath}")
+    idx = _WHITESPACE.match(text, idx + 1).end()
+    while text[idx : idx + 1] != "]":
+        item, idx = decoder.raw_decode(text, idx)
+        yield item
+        idx = _WHITESPACE.match(text, idx).end()
+        if text[idx : idx + 1] == ",":
+            idx = _WHITESPACE.match(text, idx + 1).end()
+
+
+def get_model_links(config: dict) -> Tuple[str, str]:
+    retrieval_model_link = config["retrieval_model_link"]
+    if config["reranking_model_link"] is None:
+        reranking_model_link = ""
+    else:
+        reranking_model_link = config["reranking_model_link"]
+    return retrieval_model_link, reranking_model_link
+
+
+def load_scores_from_json_file(
+    json_filepath,
+    benchmark_cols: Dict[str, List[str]],
+    metrics: List[str],
+    streaming: bool = True,
+    use_orjson: bool = False,
+) -> tuple:
+    """
+    Parse a result json file straight into the submission-level columns of `FullEvalResult.to_meta` and the score
+    arrays of `FullEvalResult.to_scores`, validating the results in the same pass.
+    The results of each item are written into the scores as they are read, and no parsed results are kept.
+    With `streaming`, the items are parsed one by one, see `iter_json_items`. Otherwise the whole file is parsed at
+    once, with orjson when `use_orjson` is set and orjson is installed, which is faster but holds the parsed file.
+    """
+    if streaming:
+        items = iter_json_items(json_filepath)
+    elif use_orjson and orjson is not None:
+        with open(json_filepath, "rb") as fp:
+            items = orjson.loads(fp.read())
+    else:
+        with open(json_filepath) as fp:
+            items = json.load(fp)
+    writer = ScoreWriter(benchmark_cols, metrics)
+    first_result = None
+    retrieval_model_link = ""
+    reranking_model_link = ""
+    for item in items:
+        config = item.get("config", {})
+        retrieval_model_link, reranking_model_link = get_model_links(config)
+        if first_result is None:
+            first_result = EvalResult.from_config(config, [])
+        results = (((r["domain"], r["lang"], r["dataset"]), r["value"]) for r in item.get("results", []))
+        writer.write(config["task"], config["metric"], results)
+    if first_result is None:
+        raise IndexError(f"no results in {json_filepath}")
+    full_eval_result = FullEvalResult.from_eval_results([first_result], retrieval_model_link, reranking_model_link)
+    return full_eval_result.to_meta(), writer.scores, writer.has_scores
+
+
+_generations = itertools.count(1)
+
 
 @dataclass
 class LeaderboardDataStore:
     version: str
     slug: str
-    raw_data: list = None
     qa_raw_df: pd.DataFrame = field(default_factory=pd.DataFrame)
     doc_raw_df: pd.DataFrame = field(default_factory=pd.DataFrame)
     qa_fmt_df: pd.DataFrame = field(default_factory=pd.DataFrame)
@@ -149,6 +385,19 @@ class LeaderboardDataStore:
     reranking_models: list = None
     qa_types: list = None
     doc_types: list = None
+    # dense scores built once at load time, see `load_cached_score_store` in src/loaders.py
+    meta_df: pd.DataFrame = None  # submission-level columns, one row per submission
+    scores: np.ndarray = None  # (submission, task, metric, benchmark), NaN for the missing scores
+    has_scores: np.ndarray = None  # (submission, task, metric), whether the submission has the results
+    benchmark_cols: dict = None  # task -> benchmark column names along the last axis of `scores`
+    fingerprints: dict = None  # relative path -> (size, mtime) of the loaded result files
+    generation: int = None  # unique for each datastore, a new one is taken every time the data is (re)loaded
+    views: dict = None  # (task, view, hidden) -> frame of a sub-tab, see `build_leaderboard_views`
+
+    def __post_init__(self):
+        # the cached leaderboard dataframes are keyed by the generation, so no two datastores share one
+        if self.generation is None:
+            self.generation = next(_generations)
 
 
 # Define an enum class with the name `TaskType`. There are two types of tasks, `qa` and `long-doc`.
@@ -0,0 +1,45 @@
+import builtins
+import sys
+import time
+
+
+class ImportProfiler:
+    """
+    Record the time spent on importing each module, like `python -X importtime` but from within the app
+    """
+
+    def __init__(self):
+        self.timings = {}  # module name -> (self time, cumulative time) in seconds
+        self._original_import = None
+        self._child_times = []
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # relative and already imported modules are not timed
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._child_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            child_time = self._child_times.pop()
+            if self._child_times:
+                self._child_times[-1] += cumulative
+            self.timings.setdefault(name, (cumulative - child_time, cumulative))
+
+    def start(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, top: int = 20) -> str:
+        rows = sorted(self.timings.items(), key=lambda x: x[1][1], reverse=True)[:top]
+        lines = [f"{'self [ms]':>10} | {'cumulative [ms]':>15} | module"]
+        for name, (self_time, cumulative) in rows:
+            lines.append(f"{self_time * 1000:>10.1f} | {cumulative * 1000:>15.1f} | {name}")
+        return "\n".join(lines)
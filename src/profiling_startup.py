@@ -0,0 +1,10 @@
+"""
+Imported first by app.py, so that the imports of the app are profiled when PROFILE_STARTUP is set
+"""
+
+from src.envs import PROFILE_STARTUP
+from src.profiling import ImportProfiler
+
+import_profiler = ImportProfiler()
+if PROFILE_STARTUP:
+    import_profiler.start()
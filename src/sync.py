@@ -0,0 +1,109 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from src.envs import BENCHMARK_VERSION_LIST, NUM_DOWNLOAD_WORKERS, SKIP_SUBMISSIONS
+
+
+def get_sync_patterns(
+    versions: List[str] = BENCHMARK_VERSION_LIST, skip_submissions: List[str] = SKIP_SUBMISSIONS
+) -> Tuple[List[str], List[str]]:
+    """
+    Get the allow and ignore patterns of the result files that the loaders read
+    """
+    # the layout is [version]/[retrieval model]/[reranking model]/results*.json, `*` also matches `/`
+    allow_patterns = [f"{version}/*/results*.json" for version in versions]
+    ignore_patterns = list(skip_submissions)
+    return allow_patterns, ignore_patterns
+
+
+def plan_sync(repo_files: List[str], allow_patterns: List[str], ignore_patterns: List[str]) -> List[str]:
+    """
+    Select the files to download, with the same pattern matching as `snapshot_download`
+    """
+    planned = []
+    for path in repo_files:
+        if not any(fnmatch(path, pattern) for pattern in allow_patterns):
+            continue
+        if any(fnmatch(path, pattern) for pattern in ignore_patterns):
+            continue
+        planned.append(path)
+    return planned
+
+
+class HubResultsSource:
+    """
+    The dataset repo on the hub storing the eval results
+    """
+
+    def __init__(self, repo_id: str, token: str = None, etag_timeout: float = 30):
+        self.repo_id = repo_id
+        self.token = token
+        self.etag_timeout = etag_timeout
+
+    def list_files(self) -> List[str]:
+        from src.envs import API
+
+        return API.list_repo_files(repo_id=self.repo_id, repo_type="dataset", token=self.token)
+
+    def download(self, path: str, local_dir: Union[Path, str]) -> bool:
+        from huggingface_hub import hf_hub_download
+
+        # the files that are up to date in `local_dir` are not downloaded again
+        hf_hub_download(
+            repo_id=self.repo_id,
+            filename=path,
+            repo_type="dataset",
+            local_dir=local_dir,
+            etag_timeout=self.etag_timeout,
+            token=self.token,
+        )
+        return True
+
+
+class LocalResultsSource:
+    """
+    A local directory standing in for the dataset repo
+    """
+
+    def __init__(self, root: Union[Path, str]):
+        self.root = Path(root)
+
+    def list_files(self) -> List[str]:
+        return sorted(p.relative_to(self.root).as_posix() for p in self.root.rglob("*") if p.is_file())
+
+    def download(self, path: str, local_dir: Union[Path, str]) -> bool:
+        src_fp = self.root / path
+        dst_fp = Path(local_dir) / path
+        src_stat = src_fp.stat()
+        if dst_fp.exists():
+            dst_stat = dst_fp.stat()
+            if dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+                return False
+        dst_fp.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src_fp, dst_fp)
+        return True
+
+
+def sync_eval_results(
+    source,
+    local_dir: Union[Path, str],
+    versions: List[str] = BENCHMARK_VERSION_LIST,
+    skip_submissions: List[str] = SKIP_SUBMISSIONS,
+    max_workers: int = NUM_DOWNLOAD_WORKERS,
+) -> List[str]:
+    """
+    Download the result files of the versions from `source` to `local_dir`, except for the skipped submissions.
+    Return the planned files.
+    """
+    allow_patterns, ignore_patterns = get_sync_patterns(versions, skip_submissions)
+    planned = plan_sync(source.list_files(), allow_patterns, ignore_patterns)
+    os.makedirs(local_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # consume the results so that the errors of the downloads are raised
+        list(executor.map(lambda path: source.download(path, local_dir), planned))
+    print(f"synced {len(planned)} result files to {local_dir}")
+    return planned
@@ -1,25 +1,71 @@
 import hashlib
 import json
+import os
 import re
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from src.benchmarks import LongDocBenchmarks, QABenchmarks
+from src import envs
+from src.benchmarks import (
+    LongDocBenchmarks,
+    LongDocColumnIndex,
+    QABenchmarks,
+    QAColumnIndex,
+    get_search_result_files,
+)
 from src.columns import (
     COL_NAME_AVG,
     COL_NAME_IS_ANONYMOUS,
     COL_NAME_RANK,
     COL_NAME_RERANKING_MODEL,
+    COL_NAME_RERANKING_MODEL_LINK,
+    COL_NAME_RERANKING_MODEL_NAME,
     COL_NAME_RETRIEVAL_MODEL,
+    COL_NAME_RETRIEVAL_MODEL_LINK,
+    COL_NAME_RETRIEVAL_MODEL_NAME,
     COL_NAME_REVISION,
     COL_NAME_TIMESTAMP,
     get_default_col_names_and_types,
     get_fixed_col_names_and_types,
 )
-from src.envs import API, LATEST_BENCHMARK_VERSION, SEARCH_RESULTS_REPO
-from src.models import TaskType, get_safe_name
+from src.envs import (
+    LATEST_BENCHMARK_VERSION,
+    LEADERBOARD_DF_CACHE_SIZE,
+    MAX_SUBMISSION_TICKETS,
+    METRIC_LIST,
+    NUM_UPLOAD_WORKERS,
+    SEARCH_RESULTS_REPO,
+)
+from src.models import TaskType, get_safe_name, model_hyperlink
+
+META_COLS = [
+    COL_NAME_RETRIEVAL_MODEL,
+    COL_NAME_RERANKING_MODEL,
+    COL_NAME_RETRIEVAL_MODEL_LINK,
+    COL_NAME_RERANKING_MODEL_LINK,
+    COL_NAME_RETRIEVAL_MODEL_NAME,
+    COL_NAME_RERANKING_MODEL_NAME,
+    COL_NAME_REVISION,
+    COL_NAME_TIMESTAMP,
+    COL_NAME_IS_ANONYMOUS,
+]
+
+MD5_CHUNK_SIZE = 8 * 1024 * 1024
+ZIP_READ_CHUNK_SIZE = 1024 * 1024
+
+# background uploads of the submissions, keyed by the submission ticket
+SUBMISSION_EXECUTOR = ThreadPoolExecutor(max_workers=NUM_UPLOAD_WORKERS)
+SUBMISSION_TICKETS = OrderedDict()
+_submission_tickets_lock = threading.Lock()
 
 
 def calculate_mean(row):
@@ -29,43 +75,64 @@ def calculate_mean(row):
         return row.mean()
 
 
+def calculate_means(df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized `calculate_mean` over the rows of the dataframe: -1 for the rows with any missing value
+    """
+    if df.shape[1] == 0:
+        return pd.Series(np.nan, index=df.index)
+    values = df.to_numpy()
+    # row-major so that each row is summed in the same order as `calculate_mean`
+    if values.dtype.kind == "f":
+        # a single copy of the scores, the missing values are zeroed in place
+        values = np.array(values, order="C")
+        is_na = np.isnan(values)
+        values[is_na] = 0.0
+    else:
+        is_na = pd.isna(values)
+        values = np.ascontiguousarray(np.where(is_na, 0.0, values), dtype=float)
+    means = values.sum(axis=1) / values.shape[1]
+    means[is_na.any(axis=1)] = -1
+    return pd.Series(means, index=df.index)
+
+
 def remove_html(input_str):
     # Regular expression for finding HTML tags
     clean = re.sub(r"<.*?>", "", input_str)
     return clean
 
 
+def get_models_mask(df: pd.DataFrame, reranking_query: list) -> np.ndarray:
+    if COL_NAME_RERANKING_MODEL_NAME in df.columns:
+        # the plain-text names are precomputed by get_leaderboard_df
+        return df[COL_NAME_RERANKING_MODEL_NAME].isin(reranking_query).to_numpy()
+    return df[COL_NAME_RERANKING_MODEL].apply(remove_html).isin(reranking_query).to_numpy()
+
+
 def filter_models(df: pd.DataFrame, reranking_query: list) -> pd.DataFrame:
     if not reranking_query:
         return df
-    else:
-        return df.loc[df[COL_NAME_RERANKING_MODEL].apply(remove_html).isin(reranking_query)]
+    return df.loc[get_models_mask(df, reranking_query)]
 
 
-def filter_queries(query: str, df: pd.DataFrame) -> pd.DataFrame:
-    filtered_df = df.copy()
-    final_df = []
-    if query != "":
-        queries = [q.strip() for q in query.split(";")]
-        for _q in queries:
-            _q = _q.strip()
-            if _q != "":
-                temp_filtered_df = search_table(filtered_df, _q)
-                if len(temp_filtered_df) > 0:
-                    final_df.append(temp_filtered_df)
-        if len(final_df) > 0:
-            filtered_df = pd.concat(final_df)
-            filtered_df = filtered_df.drop_duplicates(
-                subset=[
-                    COL_NAME_RETRIEVAL_MODEL,
-                    COL_NAME_RERANKING_MODEL,
-                ]
-            )
-    return filtered_df
+def get_queries_mask(query: str, df: pd.DataFrame) -> Optional[np.ndarray]:
+    """
+    Match the retrieval models against the queries separated by `;`, None when there is no query
+    """
+    queries = [q.strip() for q in query.split(";")]
+    queries = [q for q in queries if q != ""]
+    if not queries:
+        return None
+    # match all the queries in a single pass
+    pattern = re.compile("|".join(f"(?:{q})" for q in queries), flags=re.IGNORECASE)
+    return df[COL_NAME_RETRIEVAL_MODEL].str.contains(pattern, na=False).to_numpy(dtype=bool)
 
 
-def search_table(df: pd.DataFrame, query: str) -> pd.DataFrame:
-    return df[(df[COL_NAME_RETRIEVAL_MODEL].str.contains(query, case=False))]
+def filter_queries(query: str, df: pd.DataFrame) -> pd.DataFrame:
+    mask = get_queries_mask(query, df)
+    if mask is None or not mask.any():
+        return df
+    return df[mask]
 
 
 def get_default_cols(task: TaskType, version_slug, add_fix_cols: bool = True) -> tuple:
@@ -93,28 +160,20 @@ def get_default_cols(task: TaskType, version_slug, add_fix_cols: bool = True) ->
                 continue
             _cols.append(col_name)
             _types.append(col_type)
-        cols = fixed_cols + _cols
-        types = fixed_cols_types + _types
+        cols = list(fixed_cols) + _cols
+        types = list(fixed_cols_types) + _types
     return cols, types
 
 
 def get_selected_cols(task, version_slug, domains, languages):
-    cols, _ = get_default_cols(task=task, version_slug=version_slug, add_fix_cols=False)
-    selected_cols = []
-    for c in cols:
-        if task == TaskType.qa:
-            eval_col = QABenchmarks[version_slug].value[c].value
-        elif task == TaskType.long_doc:
-            eval_col = LongDocBenchmarks[version_slug].value[c].value
-        else:
-            raise NotImplementedError
-        if eval_col.domain not in domains:
-            continue
-        if eval_col.lang not in languages:
-            continue
-        selected_cols.append(c)
+    if task == TaskType.qa:
+        column_index = QAColumnIndex[version_slug]
+    elif task == TaskType.long_doc:
+        column_index = LongDocColumnIndex[version_slug]
+    else:
+        raise NotImplementedError
     # We use COLS to maintain sorting
-    return selected_cols
+    return column_index.select(domains, languages)
 
 
 def select_columns(
@@ -127,10 +186,10 @@ def select_columns(
 ) -> pd.DataFrame:
     selected_cols = get_selected_cols(task, version_slug, domains, languages)
     fixed_cols, _ = get_fixed_col_names_and_types()
-    filtered_df = df[fixed_cols + selected_cols]
+    filtered_df = df[list(fixed_cols) + selected_cols]
     filtered_df.replace({"": pd.NA}, inplace=True)
     if reset_ranking:
-        filtered_df[COL_NAME_AVG] = filtered_df[selected_cols].apply(calculate_mean, axis=1).round(decimals=2)
+        filtered_df[COL_NAME_AVG] = calculate_means(filtered_df[selected_cols]).round(decimals=2)
         filtered_df.sort_values(by=[COL_NAME_AVG], ascending=False, inplace=True)
         filtered_df.reset_index(inplace=True, drop=True)
         filtered_df = reset_rank(filtered_df)
@@ -149,14 +208,45 @@ def _update_df_elem(
     reset_ranking: bool = True,
     show_revision_and_timestamp: bool = False,
 ):
-    filtered_df = source_df.copy()
+    """
+    Filter the rows and select the columns of `source_df` as `filter_models`, `filter_queries` and `select_columns`
+    do. The filters are composed into one row mask and one list of columns, so the table is taken out of `source_df`
+    only once.
+    """
+    rows = np.ones(len(source_df), dtype=bool)
     if not show_anonymous:
-        filtered_df = filtered_df[~filtered_df[COL_NAME_IS_ANONYMOUS]]
-    filtered_df = filter_models(filtered_df, reranking_query)
-    filtered_df = filter_queries(query, filtered_df)
-    filtered_df = select_columns(filtered_df, domains, langs, task, reset_ranking, get_safe_name(version))
+        rows &= ~source_df[COL_NAME_IS_ANONYMOUS].to_numpy(dtype=bool)
+    if reranking_query:
+        rows &= get_models_mask(source_df, reranking_query)
+    query_mask = get_queries_mask(query, source_df)
+    # the query is ignored when it matches none of the remaining rows
+    if query_mask is not None and (rows & query_mask).any():
+        rows &= query_mask
+    row_idx = np.flatnonzero(rows)
+
+    selected_cols = get_selected_cols(task, get_safe_name(version), domains, langs)
+    fixed_cols, _ = get_fixed_col_names_and_types()
+    cols = list(fixed_cols) + selected_cols
     if not show_revision_and_timestamp:
-        filtered_df.drop([COL_NAME_REVISION, COL_NAME_TIMESTAMP], axis=1, inplace=True)
+        cols = [c for c in cols if c not in (COL_NAME_REVISION, COL_NAME_TIMESTAMP)]
+    col_idx = [source_df.columns.get_loc(c) for c in cols]
+
+    if reset_ranking:
+        # sort the rows by the average of the selected columns before taking them
+        scores = source_df.iloc[row_idx, [source_df.columns.get_loc(c) for c in selected_cols]]
+        avg = calculate_means(scores).round(decimals=2).to_numpy()
+        order = pd.Series(avg).sort_values(ascending=False).index.to_numpy()
+        row_idx = row_idx[order]
+
+    filtered_df = source_df.iloc[row_idx, col_idx]
+    # only the text columns can hold empty strings, and they are replaced only when there are any
+    for col in filtered_df.columns[filtered_df.dtypes.map(lambda dtype: dtype.kind not in "biufcmM")]:
+        if (filtered_df[col] == "").any():
+            filtered_df[col] = filtered_df[col].replace({"": pd.NA})
+    if reset_ranking:
+        filtered_df[COL_NAME_AVG] = avg[order]
+        filtered_df.index = pd.RangeIndex(len(filtered_df))
+        filtered_df = reset_rank(filtered_df)
     return filtered_df
 
 
@@ -195,6 +285,7 @@ def update_metric(
     query: str,
     show_anonymous: bool = False,
     show_revision_and_timestamp: bool = False,
+    view: Optional[str] = None,
 ) -> pd.DataFrame:
     if task == TaskType.qa:
         update_func = update_qa_df_elem
@@ -202,7 +293,7 @@ def update_metric(
         update_func = update_doc_df_elem
     else:
         raise NotImplementedError
-    df_elem = get_leaderboard_df(datastore, task=task, metric=metric)
+    df_elem = LEADERBOARD_DF_CACHE.get(datastore, task=task, metric=metric, view=view)
     version = datastore.version
     return update_func(
         version,
@@ -223,6 +314,83 @@ def upload_file(filepath: str):
     return filepath
 
 
+@lru_cache(maxsize=256)
+def _check_zip_members(filepath: str, size: int, mtime_ns: int) -> str:
+    # the result is kept for each version of the file, so that a checked zip is not decompressed again
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                # stream the member through the decompressor so that a broken crc raises BadZipFile
+                with zf.open(info) as f:
+                    while f.read(ZIP_READ_CHUNK_SIZE):
+                        pass
+    except zipfile.BadZipFile as e:
+        return str(e)
+    return ""
+
+
+def check_zip_integrity(filepath: str):
+    """
+    Decompress all the members of a zip file, raises BadZipFile when the file is broken.
+    Each version of the file is only decompressed once.
+    """
+    stat = os.stat(filepath)
+    error = _check_zip_members(str(filepath), stat.st_size, stat.st_mtime_ns)
+    if error:
+        raise zipfile.BadZipFile(error)
+
+
+def validate_submission_zip(filepath: str, version: str, check_integrity: bool = True):
+    """
+    Compare the search result files in a submission zip with the datasets of the version, without extracting it.
+    Returns the missing and the extra (task, domain, file name) tuples.
+    """
+    if check_integrity:
+        check_zip_integrity(filepath)
+    expected = get_search_result_files(version)
+    found = set()
+    with zipfile.ZipFile(filepath) as zf:
+        # the layout is [retrieval model]/[reranking model]/[task]/[domain]/[language]_[dataset]_[split].json
+        for info in zf.infolist():
+            parts = info.filename.split("/")
+            if info.is_dir() or len(parts) < 3 or not parts[-1].endswith(".json"):
+                continue
+            found.add(tuple(parts[-3:]))
+    missing = sorted(expected - found)
+    extra = sorted(k for k in found - expected if k[-1].endswith("_test.json"))
+    return missing, extra
+
+
+def get_missing_files_warning(missing: list, version: str) -> str:
+    # the evaluator reads the datasets from the contents of the files, so the file names are only checked for a warning
+    return (
+        f"Warning: the files of {len(missing)} datasets of {version} are not found by name, "
+        f"e.g. {'/'.join(missing[0])}"
+    )
+
+
+def check_submission(filepath: str, version: str):
+    if not filepath:
+        # nothing is uploaded yet
+        return ""
+    if not filepath.endswith(".zip"):
+        return styled_error(f"wrong file type: {filepath}")
+    try:
+        missing, extra = validate_submission_zip(filepath, version)
+    except zipfile.BadZipFile as e:
+        return styled_error(f"broken zip file: {e}")
+    if missing:
+        msg = get_missing_files_warning(missing, version)
+    else:
+        msg = f"The search results cover all the datasets of {version}."
+    if extra:
+        extra_list = ", ".join("/".join(k) for k in extra)
+        msg += f"\nThe following datasets are not in {version} and will be ignored: {extra_list}"
+    return styled_message(msg)
+
+
 def get_iso_format_timestamp():
     # Get the current timestamp with UTC as the timezone
     current_timestamp = datetime.now(timezone.utc)
@@ -236,19 +404,78 @@ def get_iso_format_timestamp():
     return iso_format_timestamp, filename_friendly_timestamp
 
 
-def calculate_file_md5(file_path):
+def calculate_file_md5(file_path, chunk_size: int = MD5_CHUNK_SIZE):
     md5 = hashlib.md5()
 
-    with open(file_path, "rb") as f:
+    # read the file in large chunks into a reused buffer
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
         while True:
-            data = f.read(4096)
-            if not data:
+            size = f.readinto(buffer)
+            if not size:
                 break
-            md5.update(data)
+            md5.update(view[:size])
 
     return md5.hexdigest()
 
 
+def upload_submission(
+    filepath: str,
+    config_filepath: str,
+    model: str,
+    reranking_model: str,
+    version: str,
+    output_fn: str,
+    api=None,
+):
+    """
+    Upload the search results and the config of a submission to the search results repo in one commit
+    """
+    from huggingface_hub import CommitOperationAdd
+
+    api = envs.API if api is None else api
+    output_folder = f"{version}/{model}/{reranking_model}"
+    operations = [
+        CommitOperationAdd(path_in_repo=f"{output_folder}/{output_fn}", path_or_fileobj=filepath),
+        CommitOperationAdd(
+            path_in_repo=f"{output_folder}/{Path(config_filepath).name}", path_or_fileobj=config_filepath
+        ),
+    ]
+    return api.create_commit(
+        repo_id=SEARCH_RESULTS_REPO,
+        repo_type="dataset",
+        operations=operations,
+        commit_message=f"feat: submit {model} + {reranking_model} to evaluate",
+    )
+
+
+def add_submission_ticket(ticket: str, future, max_tickets: int = MAX_SUBMISSION_TICKETS):
+    """
+    Keep the upload of a submission for the status checks, at most `max_tickets` of them.
+    The oldest finished uploads are dropped first, the running ones are always kept.
+    """
+    with _submission_tickets_lock:
+        SUBMISSION_TICKETS[ticket] = future
+        num_dropped = len(SUBMISSION_TICKETS) - max_tickets
+        if num_dropped > 0:
+            finished = [t for t, f in SUBMISSION_TICKETS.items() if f.done()][:num_dropped]
+            for t in finished:
+                del SUBMISSION_TICKETS[t]
+
+
+def get_submission_status(ticket: str):
+    ticket = ticket.strip()
+    future = SUBMISSION_TICKETS.get(ticket)
+    if future is None:
+        return styled_error(f"unknown submission ticket: {ticket}")
+    if not future.done():
+        return styled_message(f"Submission {ticket} is still uploading.")
+    if future.exception() is not None:
+        return styled_error(f"failed to upload submission {ticket}. {future.exception()}")
+    return styled_message(f"Submission {ticket} is uploaded.")
+
+
 def submit_results(
     filepath: str,
     model: str,
@@ -278,6 +505,15 @@ def submit_results(
                     f"failed to submit. Model url must start with `https://` or `http://`. Illegal model url: {model_url}"
                 )
 
+    # the members are only decompressed again when the zip was not checked by `check_submission` at upload time
+    try:
+        missing, _ = validate_submission_zip(filepath, version)
+    except zipfile.BadZipFile as e:
+        return styled_error(f"failed to submit. Broken zip file: {e}")
+    warning = ""
+    if missing:
+        warning = f"\n{get_missing_files_warning(missing, version)}"
+
     # rename the uploaded file
     input_fp = Path(filepath)
     revision = calculate_file_md5(filepath)
@@ -288,14 +524,6 @@ def submit_results(
     if not reranking_model:
         reranking_model = "NoReranker"
 
-    API.upload_file(
-        path_or_fileobj=filepath,
-        path_in_repo=f"{version}/{model}/{reranking_model}/{output_fn}",
-        repo_id=SEARCH_RESULTS_REPO,
-        repo_type="dataset",
-        commit_message=f"feat: submit {model} to evaluate",
-    )
-
     output_config_fn = f"{output_fn.removesuffix('.zip')}.json"
     output_config = {
         "model_name": f"{model}",
@@ -309,16 +537,24 @@ def submit_results(
     }
     with open(input_folder_path / output_config_fn, "w") as f:
         json.dump(output_config, f, indent=4, ensure_ascii=False)
-    API.upload_file(
-        path_or_fileobj=input_folder_path / output_config_fn,
-        path_in_repo=f"{version}/{model}/{reranking_model}/{output_config_fn}",
-        repo_id=SEARCH_RESULTS_REPO,
-        repo_type="dataset",
-        commit_message=f"feat: submit {model} + {reranking_model} config",
+
+    # upload in the background so that large files do not hold a slot of the queue
+    ticket = output_fn.removesuffix(".zip")
+    future = SUBMISSION_EXECUTOR.submit(
+        upload_submission,
+        filepath,
+        str(input_folder_path / output_config_fn),
+        model,
+        reranking_model,
+        version,
+        output_fn,
     )
+    add_submission_ticket(ticket, future)
     return styled_message(
         f"Thanks for submission!\n"
-        f"Retrieval method: {model}\nReranking model: {reranking_model}\nSubmission revision: {revision}"
+        f"Retrieval method: {model}\nReranking model: {reranking_model}\nSubmission revision: {revision}\n"
+        f"Submission ticket: {ticket}. The upload continues in the background, check its status with the ticket."
+        f"{warning}"
     )
 
 
@@ -327,37 +563,104 @@ def reset_rank(df):
     return df
 
 
+BM25_LINK = model_hyperlink("https://github.com/castorini/pyserini", "BM25")
+
+# subsets of the submissions shown in the sub-tabs
+VIEW_RETRIEVAL_ONLY = "retrieval_only"
+VIEW_RERANKING_ONLY = "reranking_only"
+
+
+def filter_df_ret(df):
+    df_ret = df[df[COL_NAME_RERANKING_MODEL] == "NoReranker"]
+    df_ret = reset_rank(df_ret)
+    return df_ret
+
+
+def filter_df_rerank(df):
+    df_rerank = df[df[COL_NAME_RETRIEVAL_MODEL] == BM25_LINK]
+    df_rerank = reset_rank(df_rerank)
+    return df_rerank
+
+
+LEADERBOARD_VIEW_FILTERS = {VIEW_RETRIEVAL_ONLY: filter_df_ret, VIEW_RERANKING_ONLY: filter_df_rerank}
+
+
+def build_leaderboard_views(datastore):
+    """
+    Build the frames of the Retrieval Only and Reranking Only tabs once at load time, from the default frames of the
+    datastore. The hidden views are taken from the raw frames instead of the formatted ones.
+    """
+    views = {}
+    for task, raw_df, fmt_df in [
+        (TaskType.qa, datastore.qa_raw_df, datastore.qa_fmt_df),
+        (TaskType.long_doc, datastore.doc_raw_df, datastore.doc_fmt_df),
+    ]:
+        for view, filter_fn in LEADERBOARD_VIEW_FILTERS.items():
+            views[(task.value, view, False)] = filter_fn(fmt_df)
+            views[(task.value, view, True)] = filter_fn(raw_df)
+    datastore.views = views
+    return datastore
+
+
+def get_leaderboard_view(datastore, task: TaskType, view: str, hidden: bool = False) -> pd.DataFrame:
+    """
+    Get the submissions of the Retrieval Only or Reranking Only tab at the default metric, with the ranks reset
+    """
+    return datastore.views[(task.value, view, hidden)]
+
+
+def get_benchmark_cols(version_slug: str) -> dict:
+    """
+    Gets the benchmark columns of each task, which make up the benchmark axis of the score tensor
+    """
+    benchmark_cols = {}
+    for task in TaskType:
+        if task == TaskType.qa:
+            benchmarks = QABenchmarks[version_slug]
+        elif task == TaskType.long_doc:
+            benchmarks = LongDocBenchmarks[version_slug]
+        else:
+            raise NotImplementedError
+        benchmark_cols[task.value] = [t.value.col_name for t in list(benchmarks.value)]
+    return benchmark_cols
+
+
 def get_leaderboard_df(datastore, task: TaskType, metric: str) -> pd.DataFrame:
     """
-    Creates a dataframe from all the individual experiment results
+    Creates a dataframe from the dense score tensor of the datastore
     """
-    # load the selected metrics into a DataFrame from the raw json
-    all_data_json = []
-    for v in datastore.raw_data:
-        all_data_json += v.to_dict(task=task.value, metric=metric)
-    df = pd.DataFrame.from_records(all_data_json)
+    task_idx = list(datastore.benchmark_cols).index(task.value)
+    metric_idx = METRIC_LIST.index(metric)
+    benchmark_cols = datastore.benchmark_cols[task.value]
+
+    # slice the selected task and metric out of the score tensor
+    rows = datastore.has_scores[:, task_idx, metric_idx]
+    scores = datastore.scores[rows, task_idx, metric_idx, : len(benchmark_cols)]
+    # filter out the benchmarks that are not in the data
+    valid = ~np.isnan(scores).all(axis=0)
+    df = pd.concat(
+        [
+            datastore.meta_df[rows].reset_index(drop=True),
+            pd.DataFrame(scores[:, valid], columns=[c for c, v in zip(benchmark_cols, valid) if v]),
+        ],
+        axis=1,
+    )
 
     # calculate the average scores for selected task
+    valid_cols = frozenset(df.columns.to_list())
+    benchmark_cols = [c for c in benchmark_cols if c in valid_cols]
+    df[COL_NAME_AVG] = calculate_means(df[benchmark_cols]).round(decimals=2)
+    df.sort_values(by=[COL_NAME_AVG], ascending=False, inplace=True)
+    df.reset_index(inplace=True, drop=True)
+
+    # filter out columns that are not in the data
+    display_cols = [COL_NAME_IS_ANONYMOUS, COL_NAME_RETRIEVAL_MODEL_NAME, COL_NAME_RERANKING_MODEL_NAME, COL_NAME_AVG]
     if task == TaskType.qa:
         benchmarks = QABenchmarks[datastore.slug]
     elif task == TaskType.long_doc:
         benchmarks = LongDocBenchmarks[datastore.slug]
     else:
         raise NotImplementedError
-    valid_cols = frozenset(df.columns.to_list())
-    benchmark_cols = []
-    for t in list(benchmarks.value):
-        if t.value.col_name not in valid_cols:
-            continue
-        benchmark_cols.append(t.value.col_name)
-
-    # filter out the columns that are not in the data
-    df[COL_NAME_AVG] = df[list(benchmark_cols)].apply(calculate_mean, axis=1).round(decimals=2)
-    df.sort_values(by=[COL_NAME_AVG], ascending=False, inplace=True)
-    df.reset_index(inplace=True, drop=True)
-
-    # filter out columns that are not in the data
-    display_cols = [COL_NAME_IS_ANONYMOUS, COL_NAME_AVG]
     default_cols, _ = get_default_col_names_and_types(benchmarks)
     for col in default_cols:
         if col in valid_cols:
@@ -373,48 +676,184 @@ def get_leaderboard_df(datastore, task: TaskType, metric: str) -> pd.DataFrame:
     return df
 
 
+class LeaderboardDFCache:
+    """
+    A bounded LRU cache of the leaderboard dataframes, keyed by (version, task, metric, generation, view).
+    These are the source frames of the tables that the event handlers filter, so they stay on the server instead of
+    being sent to the browser in hidden tables. The cached dataframes are shared among the requests and must not be
+    modified in place.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, datastore, task: TaskType, metric: str, view: Optional[str] = None) -> pd.DataFrame:
+        """Get all the submissions, or the subset of the Retrieval Only or Reranking Only tab with `view`"""
+        key = (datastore.version, task, metric, datastore.generation, view)
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+        if view is None:
+            df = get_leaderboard_df(datastore, task, metric)
+        else:
+            df = LEADERBOARD_VIEW_FILTERS[view](self.get(datastore, task, metric))
+        with self._lock:
+            self._data[key] = df
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return df
+
+    def invalidate(self, datastore):
+        """Drop the cached dataframes of the older generations of the datastore's version"""
+        with self._lock:
+            for key in list(self._data):
+                if key[0] == datastore.version and key[3] != datastore.generation:
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._data)}
+
+
+LEADERBOARD_DF_CACHE = LeaderboardDFCache(LEADERBOARD_DF_CACHE_SIZE)
+
+
+class SubTabState:
+    """
+    The active sub-tab of a task and the stamps of its tables, kept in the state of each session.
+    A change of the shared selectors bumps the stamp, and a table is stale when it was rendered at an older stamp.
+    """
+
+    def __init__(self, num_tabs: int, active: int = 0):
+        self.active = active
+        self.stamp = 0
+        self.rendered = [0] * num_tabs
+
+    def change(self) -> int:
+        """The shared selectors changed, return the sub-tab to update now"""
+        self.stamp += 1
+        return self.active
+
+    def select(self, index: int) -> bool:
+        """The sub-tab is selected, return whether its table is stale"""
+        self.active = index
+        return self.rendered[index] < self.stamp
+
+    def mark_rendered(self, index: int):
+        self.rendered[index] = self.stamp
+
+
 def set_listeners(
     task: TaskType,
-    target_df,
-    source_df,
-    search_bar,
+    tabs: list,
     version,
+    metric,
     selected_domains,
     selected_langs,
-    selected_rerankings,
     show_anonymous,
     show_revision_and_timestamp,
+    get_datastore,
 ):
-    if task == TaskType.qa:
-        update_table_func = update_qa_df_elem
-    elif task == TaskType.long_doc:
-        update_table_func = update_doc_df_elem
-    else:
-        raise NotImplementedError
-    selector_list = [selected_domains, selected_langs, selected_rerankings, search_bar, show_anonymous]
-    search_bar_args = [
-        source_df,
-        version,
-    ] + selector_list
-    selector_args = (
-        [version, source_df]
-        + selector_list
-        + [
+    """
+    Update the tables of the sub-tabs of a task when the selectors change.
+    `tabs` holds a (tab_item, target_df, view, search_bar, selected_rerankings) tuple for each sub-tab.
+    The source frame of a table is looked up on the server by (version, task, metric, view), only the values of the
+    selectors are sent with the events. The selectors shared by the sub-tabs only update the table of the active
+    sub-tab, the other tables are updated when their sub-tab is selected.
+    """
+    import gradio as gr
+
+    def update_table_func(
+        view: Optional[str],
+        version: str,
+        metric: str,
+        domains: list,
+        langs: list,
+        reranking_query: list,
+        query: str,
+        show_anonymous: bool,
+        show_revision_and_timestamp: bool = False,
+    ):
+        return update_metric(
+            get_datastore(version),
+            task,
+            metric,
+            domains,
+            langs,
+            reranking_query,
+            query,
+            show_anonymous,
             show_revision_and_timestamp,
-        ]
-    )
-    # Set search_bar listener
-    search_bar.submit(update_table_func, search_bar_args, target_df)
+            view,
+        )
+
+    tab_state = gr.State(SubTabState(len(tabs)))
+    shared_args = [version, metric, selected_domains, selected_langs, show_anonymous, show_revision_and_timestamp]
+    # the selectors of each sub-tab, in the order of `tabs`
+    tab_args = [arg for _, _, _, search_bar, selected_rerankings in tabs for arg in [selected_rerankings, search_bar]]
+    target_dfs = [target_df for _, target_df, _, _, _ in tabs]
+
+    def render_tab(state: SubTabState, index: int, shared_values: list, tab_values: list):
+        version, metric, domains, langs, show_anonymous, show_revision_and_timestamp = shared_values
+        reranking_query, query = tab_values[2 * index : 2 * index + 2]
+        state.mark_rendered(index)
+        return update_table_func(
+            tabs[index][2],
+            version,
+            metric,
+            domains,
+            langs,
+            reranking_query,
+            query,
+            show_anonymous,
+            show_revision_and_timestamp,
+        )
 
-    # Set column-wise listener
-    for selector in selector_list:
+    def update_active_tab(state: SubTabState, *values):
+        index = state.change()
+        outputs = [gr.update() for _ in tabs]
+        outputs[index] = render_tab(state, index, values[: len(shared_args)], values[len(shared_args) :])
+        return [state] + outputs
+
+    def get_select_tab_func(index: int):
+        def select_tab(state: SubTabState, *values):
+            if not state.select(index):
+                return state, gr.update()
+            return state, render_tab(state, index, values[: len(shared_args)], values[len(shared_args) :])
+
+        return select_tab
+
+    # Set the listeners of the shared selectors
+    for selector in [metric, selected_domains, selected_langs, show_anonymous, show_revision_and_timestamp]:
         selector.change(
-            update_table_func,
-            selector_args,
-            target_df,
+            update_active_tab,
+            [tab_state] + shared_args + tab_args,
+            [tab_state] + target_dfs,
             queue=True,
         )
 
+    for index, (tab_item, target_df, view, search_bar, selected_rerankings) in enumerate(tabs):
+        tab_item.select(get_select_tab_func(index), [tab_state] + shared_args + tab_args, [tab_state, target_df])
+        # Set the listeners of the selectors of the sub-tab
+        selector_args = [version, metric, selected_domains, selected_langs, selected_rerankings, search_bar]
+        selector_args += [show_anonymous, show_revision_and_timestamp]
+        search_bar.submit(partial(update_table_func, view), selector_args, target_df)
+        selected_rerankings.change(partial(update_table_func, view), selector_args, target_df, queue=True)
+
 
 def update_qa_df_elem(
     version: str,
@@ -0,0 +1,39 @@
+"""
+Micro-benchmark of the row-wise `calculate_mean` apply against the vectorized `calculate_means`
+
+Usage: python -m tests.benchmarks.bench_calculate_means
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from src.utils import calculate_mean, calculate_means
+
+NUM_COLS = 53  # number of QA benchmarks in AIR-Bench_24.05
+
+
+def make_scores_df(num_rows: int, num_cols: int = NUM_COLS, missing_ratio: float = 0.001) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    values = rng.random((num_rows, num_cols)) * 100
+    values[rng.random((num_rows, num_cols)) < missing_ratio] = np.nan
+    return pd.DataFrame(values, columns=[f"benchmark_{i}" for i in range(num_cols)])
+
+
+def main():
+    for num_rows in [1_000, 10_000]:
+        df = make_scores_df(num_rows)
+        expected = df.apply(calculate_mean, axis=1).round(decimals=2)
+        assert expected.equals(calculate_means(df).round(decimals=2))
+        number = 3
+        apply_time = timeit.timeit(lambda: df.apply(calculate_mean, axis=1), number=number) / number
+        vectorized_time = timeit.timeit(lambda: calculate_means(df), number=number) / number
+        print(
+            f"{num_rows} rows x {NUM_COLS} cols: apply {apply_time * 1000:.2f} ms, "
+            f"vectorized {vectorized_time * 1000:.2f} ms, speedup {apply_time / vectorized_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
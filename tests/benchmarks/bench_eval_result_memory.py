@@ -0,0 +1,85 @@
+"""
+Resident memory of the loaded results: the result dicts of the json files and the compact `FullEvalResult` of the
+offline path, against the score tensor of `LeaderboardDataStore` that the app keeps
+
+Usage: python -m tests.benchmarks.bench_eval_result_memory
+"""
+
+import gc
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from src.loaders import get_result_filepaths, load_cached_score_store, load_raw_eval_results
+from src.models import LeaderboardDataStore, get_safe_name
+from src.utils import get_benchmark_cols
+
+VERSION = "AIR-Bench_24.05"
+TOY_FILE = Path(__file__).parents[1] / f"toydata/eval_results/{VERSION}/bge-m3/NoReranker/results.json"
+
+
+def make_results_tree(results_path: Path, num_submissions: int):
+    """Copy the toy submission into `num_submissions` submissions with different models and timestamps"""
+    with open(TOY_FILE) as f:
+        model_data = json.load(f)
+    for i in range(num_submissions):
+        for item in model_data:
+            item["config"]["retrieval_model"] = f"model-{i}"
+            item["config"]["timestamp"] = f"2024-06-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z"
+        output_fp = results_path / f"model-{i}" / "NoReranker" / "results.json"
+        output_fp.parent.mkdir(parents=True)
+        with open(output_fp, "w") as f:
+            json.dump(model_data, f)
+
+
+def load_result_dicts(results_path: Path) -> list:
+    """The results as they were kept before, one dict for each score"""
+    output = []
+    for fp in get_result_filepaths(results_path):
+        with open(fp) as f:
+            output.append([item["results"] for item in json.load(f)])
+    return output
+
+
+def load_score_store(results_path: Path) -> LeaderboardDataStore:
+    ds = LeaderboardDataStore(VERSION, get_safe_name(VERSION))
+    return load_cached_score_store(ds, results_path, None)
+
+
+def measure(fn, results_path: Path) -> int:
+    gc.collect()
+    tracemalloc.start()
+    output = fn(results_path)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del output
+    return current
+
+
+def main():
+    # build the benchmark enums of the version once, outside of the measures
+    get_benchmark_cols(get_safe_name(VERSION))
+    with open(TOY_FILE) as f:
+        num_scores = sum(len(item["results"]) for item in json.load(f))
+    cases = [
+        ("result dicts", load_result_dicts),
+        ("FullEvalResult", load_raw_eval_results),
+        ("score tensor", load_score_store),
+    ]
+    for num_submissions in [10, 100]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_path = Path(tmp_dir)
+            make_results_tree(results_path, num_submissions)
+            print(f"{num_submissions} submissions, {num_scores * num_submissions} scores")
+            for name, fn in cases:
+                current = measure(fn, results_path)
+                print(
+                    f"  {name:<16}: {current / 1024 / 1024:6.2f} MB, "
+                    f"{current / (num_scores * num_submissions):6.1f} bytes/score"
+                )
+
+
+if __name__ == "__main__":
+    main()
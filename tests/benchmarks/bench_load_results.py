@@ -0,0 +1,81 @@
+"""
+Load time of a synthetic submission tree: the former loading, which validated every result with `to_dict` and
+converted it again with `to_dict` for each task, against the single pass of `load_leaderboard_datastore` that
+validates the results while it fills the scores
+
+Usage: python -m tests.benchmarks.bench_load_results
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.envs import DEFAULT_METRIC_LONG_DOC, DEFAULT_METRIC_QA
+from src.loaders import load_cached_score_store, load_leaderboard_datastore, load_raw_eval_results
+from src.models import LeaderboardDataStore, TaskType
+
+VERSION = "AIR-Bench_24.04"
+TOY_FILE = (
+    Path(__file__).parents[1]
+    / f"toydata/eval_results/{VERSION}/bge-m3/jina-reranker-v2-base-multilingual/results.json"
+)
+
+
+def make_results_tree(results_path: Path, num_submissions: int):
+    """Copy the toy submission into `num_submissions` submissions with different models and timestamps"""
+    with open(TOY_FILE) as f:
+        model_data = json.load(f)
+    for i in range(num_submissions):
+        for item in model_data:
+            item["config"]["retrieval_model"] = f"model-{i}"
+            item["config"]["timestamp"] = f"2024-06-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z"
+        output_fp = results_path / VERSION / f"model-{i}" / "NoReranker" / "results.json"
+        output_fp.parent.mkdir(parents=True)
+        with open(output_fp, "w") as f:
+            json.dump(model_data, f)
+
+
+def load_with_to_dict(results_path: Path):
+    raw_data = load_raw_eval_results(results_path)
+    # the former validation pass, its output was thrown away
+    for v in raw_data:
+        v.to_dict()
+    # the former leaderboard dataframes, converted again for each task
+    qa_records = [r for v in raw_data for r in v.to_dict(TaskType.qa.value, DEFAULT_METRIC_QA)]
+    doc_records = [r for v in raw_data for r in v.to_dict(TaskType.long_doc.value, DEFAULT_METRIC_LONG_DOC)]
+    return pd.DataFrame.from_records(qa_records), pd.DataFrame.from_records(doc_records)
+
+
+def load_with_single_pass(results_path: Path, streaming: bool):
+    ds = LeaderboardDataStore(VERSION, "air_bench_2404")
+    return load_cached_score_store(ds, results_path, None, streaming=streaming)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # build the benchmark enums and import air_benchmark before timing
+        make_results_tree(Path(tmp_dir) / "warmup", 1)
+        load_leaderboard_datastore(Path(tmp_dir) / "warmup" / VERSION, VERSION)
+        for num_submissions in [50, 200]:
+            results_path = Path(tmp_dir) / str(num_submissions)
+            make_results_tree(results_path, num_submissions)
+            cases = [
+                ("to_dict passes", lambda: load_with_to_dict(results_path / VERSION)),
+                ("single pass", lambda: load_with_single_pass(results_path / VERSION, False)),
+                ("single pass, streaming", lambda: load_with_single_pass(results_path / VERSION, True)),
+            ]
+            print(f"{num_submissions} submissions")
+            for name, fn in cases:
+                elapsed = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    fn()
+                    elapsed.append(time.perf_counter() - start)
+                print(f"  {name:<22}: {min(elapsed) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Parse time and peak memory of a large result file: `FullEvalResult.init_from_json_file` + `to_scores` against
+`load_scores_from_json_file` with the whole file parsed by orjson, and with the items decoded one by one
+
+Usage: python -m tests.benchmarks.bench_parse_results
+"""
+
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.envs import METRIC_LIST
+from src.models import FullEvalResult, load_scores_from_json_file, orjson
+from src.utils import get_benchmark_cols
+
+VERSION_SLUG = "air_bench_2405"
+TOY_FILE = Path(__file__).parents[1] / "toydata/eval_results/AIR-Bench_24.05/bge-m3/NoReranker/results.json"
+
+
+def make_result_file(fp: Path, num_copies: int):
+    """Repeat the items of the toy submission to get a large result file"""
+    with open(TOY_FILE) as f:
+        model_data = json.load(f)
+    with open(fp, "w") as f:
+        json.dump(model_data * num_copies, f)
+
+
+def parse_full_eval_result(fp, benchmark_cols):
+    full_eval_result = FullEvalResult.init_from_json_file(fp)
+    scores, has_scores = full_eval_result.to_scores(benchmark_cols, METRIC_LIST)
+    # the parsed results are kept in the raw data of the datastore
+    return full_eval_result, scores, has_scores
+
+
+def measure(fn, *args):
+    # time without tracing, tracemalloc slows down the allocations
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    benchmark_cols = get_benchmark_cols(VERSION_SLUG)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_copies in [10, 50]:
+            fp = Path(tmp_dir) / "results.json"
+            make_result_file(fp, num_copies)
+            size_mb = fp.stat().st_size / 1024 / 1024
+            print(f"result file of {size_mb:.1f} MB")
+            cases = [("json.load + to_scores", parse_full_eval_result, (fp, benchmark_cols))]
+            if orjson is not None:
+                cases.append(
+                    ("whole file (orjson)", load_scores_from_json_file, (fp, benchmark_cols, METRIC_LIST, False, True))
+                )
+            cases.append(
+                ("streaming (incremental)", load_scores_from_json_file, (fp, benchmark_cols, METRIC_LIST, True))
+            )
+            for name, fn, args in cases:
+                elapsed, peak = measure(fn, *args)
+                print(f"  {name:<24}: {elapsed * 1000:8.1f} ms, peak memory {peak / 1024 / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
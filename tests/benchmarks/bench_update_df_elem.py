@@ -0,0 +1,128 @@
+"""
+Allocations and time of a filter request on a table of 1k submissions: the former `_update_df_elem`, which copied the
+source frame and built an intermediate frame in each filter, against the single take of `_update_df_elem`
+
+Usage: python -m tests.benchmarks.bench_update_df_elem
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.columns import (
+    COL_NAME_IS_ANONYMOUS,
+    COL_NAME_RERANKING_MODEL,
+    COL_NAME_RERANKING_MODEL_NAME,
+    COL_NAME_RETRIEVAL_MODEL,
+    COL_NAME_RETRIEVAL_MODEL_NAME,
+    COL_NAME_REVISION,
+    COL_NAME_TIMESTAMP,
+)
+from src.loaders import load_leaderboard_datastore
+from src.models import TaskType, get_safe_name, model_hyperlink
+from src.utils import _update_df_elem, filter_models, filter_queries, select_columns
+
+VERSION = "AIR-Bench_24.04"
+TOY_PATH = Path(__file__).parents[1] / f"toydata/eval_results/{VERSION}"
+NUM_ROWS = 1000
+RERANKING_MODELS = ["NoReranker", "bge-reranker-v2-m3", "jina-reranker-v2-base-multilingual"]
+
+
+def make_leaderboard_df(num_rows: int) -> pd.DataFrame:
+    """Repeat the toy submission with different models and random scores"""
+    rng = np.random.default_rng(0)
+    toy_df = load_leaderboard_datastore(TOY_PATH, VERSION).qa_raw_df
+    df = toy_df.iloc[np.zeros(num_rows, dtype=int)].reset_index(drop=True)
+    score_cols = df.select_dtypes("float").columns
+    df[score_cols] = rng.random((num_rows, len(score_cols))).round(2)
+    retrieval_models = [f"model-{i}" for i in range(num_rows)]
+    reranking_models = [RERANKING_MODELS[i % len(RERANKING_MODELS)] for i in range(num_rows)]
+    df[COL_NAME_RETRIEVAL_MODEL_NAME] = retrieval_models
+    df[COL_NAME_RETRIEVAL_MODEL] = [model_hyperlink("https://example.com", m) for m in retrieval_models]
+    df[COL_NAME_RERANKING_MODEL_NAME] = reranking_models
+    df[COL_NAME_RERANKING_MODEL] = [model_hyperlink("https://example.com", m) for m in reranking_models]
+    df[COL_NAME_IS_ANONYMOUS] = rng.random(num_rows) < 0.2
+    return df
+
+
+def update_df_elem_with_copies(
+    task, version, source_df, domains, langs, reranking_query, query, show_anonymous, show_revision_and_timestamp
+):
+    """The former pipeline"""
+    filtered_df = source_df.copy()
+    if not show_anonymous:
+        filtered_df = filtered_df[~filtered_df[COL_NAME_IS_ANONYMOUS]]
+    filtered_df = filter_models(filtered_df, reranking_query)
+    filtered_df = filter_queries(query, filtered_df)
+    filtered_df = select_columns(filtered_df, domains, langs, task, True, get_safe_name(version))
+    if not show_revision_and_timestamp:
+        filtered_df.drop([COL_NAME_REVISION, COL_NAME_TIMESTAMP], axis=1, inplace=True)
+    return filtered_df
+
+
+def update_df_elem_with_single_take(
+    task, version, source_df, domains, langs, reranking_query, query, show_anonymous, show_revision_and_timestamp
+):
+    return _update_df_elem(
+        task,
+        version,
+        source_df,
+        domains,
+        langs,
+        reranking_query,
+        query,
+        show_anonymous,
+        True,
+        show_revision_and_timestamp,
+    )
+
+
+def measure(fn, *args):
+    # time without tracing, tracemalloc slows down the allocations
+    elapsed = []
+    for _ in range(20):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(elapsed), peak
+
+
+def main():
+    source_df = make_leaderboard_df(NUM_ROWS)
+    domains = ["wiki", "web", "news", "healthcare", "law"]
+    langs = ["en", "zh"]
+    cases = [
+        ("no filter", ([], "", True, True)),
+        ("anonymous hidden", ([], "", False, False)),
+        ("reranking models", (RERANKING_MODELS[1:], "", False, False)),
+        ("search", ([], "model-1;model-2", False, False)),
+    ]
+    print(f"{NUM_ROWS} submissions")
+    for name, (reranking_query, query, show_anonymous, show_revision_and_timestamp) in cases:
+        args = (
+            TaskType.qa,
+            VERSION,
+            source_df,
+            domains,
+            langs,
+            reranking_query,
+            query,
+            show_anonymous,
+            show_revision_and_timestamp,
+        )
+        pd.testing.assert_frame_equal(update_df_elem_with_single_take(*args), update_df_elem_with_copies(*args))
+        print(f"  {name}")
+        for fn_name, fn in [("copies", update_df_elem_with_copies), ("single take", update_df_elem_with_single_take)]:
+            elapsed, peak = measure(fn, *args)
+            print(f"    {fn_name:<12}: {elapsed * 1000:6.2f} ms, peak allocations {peak / 1024:7.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
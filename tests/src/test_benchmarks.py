@@ -1,6 +1,6 @@
 import pytest
 
-from src.benchmarks import LongDocBenchmarks, QABenchmarks
+from src.benchmarks import LongDocBenchmarks, LongDocColumnIndex, QABenchmarks, QAColumnIndex
 from src.envs import BENCHMARK_VERSION_LIST
 
 # Ref: https://github.com/AIR-Bench/AIR-Bench/blob/4b27b8a8f2047a963805fcf6fb9d74be51ec440c/docs/available_tasks.md
@@ -31,3 +31,39 @@ def test_doc_benchmarks(num_datasets_dict):
     for benchmark_list in list(LongDocBenchmarks):
         version_slug = benchmark_list.name
         assert num_datasets_dict[version_slug] == len(benchmark_list.value)
+
+
+@pytest.mark.parametrize(
+    "benchmarks, column_index", [(QABenchmarks, QAColumnIndex), (LongDocBenchmarks, LongDocColumnIndex)]
+)
+def test_column_selection_index(benchmarks, column_index):
+    for benchmark_list in list(benchmarks):
+        index = column_index[benchmark_list.name]
+        benchmark_values = [b.value for b in list(benchmark_list.value)]
+        assert list(index.cols) == [b.col_name for b in benchmark_values]
+        domains = sorted(index.domain_bits)
+        langs = sorted(index.lang_bits)
+        selections = [(domains, langs), (domains[:1], langs), (domains, langs[:2]), ([], langs)]
+        for selected_domains, selected_langs in selections:
+            expected = [
+                b.col_name for b in benchmark_values if b.domain in selected_domains and b.lang in selected_langs
+            ]
+            assert index.select(selected_domains, selected_langs) == expected
+
+
+def test_benchmarks_are_built_lazily():
+    from src.benchmarks import BenchmarkVersions, get_qa_benchmarks_dict
+
+    built = []
+
+    def get_benchmarks_dict(version):
+        built.append(version)
+        return get_qa_benchmarks_dict(version)
+
+    benchmarks = BenchmarkVersions("TestBenchmarks", get_benchmarks_dict)
+    assert [b.name for b in benchmarks] == ["air_bench_2404", "air_bench_2405"]
+    assert built == []
+    benchmark_list = benchmarks["air_bench_2404"]
+    assert benchmark_list.value is benchmark_list.value
+    assert len(benchmark_list.value) == 13
+    assert built == ["AIR-Bench_24.04"]
@@ -3,11 +3,15 @@ import pytest
 from src.benchmarks import LongDocBenchmarks, QABenchmarks
 from src.columns import (
     COL_NAME_AVG,
+    COL_NAME_IS_ANONYMOUS,
     COL_NAME_RANK,
     COL_NAME_RERANKING_MODEL,
+    COL_NAME_RERANKING_MODEL_LINK,
     COL_NAME_RETRIEVAL_MODEL,
+    COL_NAME_RETRIEVAL_MODEL_LINK,
     COL_NAME_REVISION,
     COL_NAME_TIMESTAMP,
+    get_column_schema,
     get_default_auto_eval_column_dict,
     get_default_col_names_and_types,
     get_fixed_col_names_and_types,
@@ -117,3 +121,19 @@ def test_get_default_col_names_and_types(
     for benchmark in benchmarks:
         col_names, col_types = get_default_col_names_and_types(benchmark)
         assert len(col_names) == expected_benchmark_len[benchmark.name] + default_col_len - hidden_col_len
+
+
+@pytest.mark.parametrize("benchmarks", [QABenchmarks, LongDocBenchmarks])
+def test_get_column_schema(benchmarks):
+    for benchmark in benchmarks:
+        schema = get_column_schema(benchmark)
+        # the schema is built only once for each benchmark enum
+        assert get_column_schema(benchmark) is schema
+        assert isinstance(schema.names, tuple)
+        assert len(schema.names) == len(schema.types) == len(schema.hidden)
+        hidden_cols = [name for name, hidden in zip(schema.names, schema.hidden) if hidden]
+        assert hidden_cols == [COL_NAME_RETRIEVAL_MODEL_LINK, COL_NAME_RERANKING_MODEL_LINK, COL_NAME_IS_ANONYMOUS]
+        assert schema.displayed_names == tuple(name for name in schema.names if name not in hidden_cols)
+        col_names, col_types = get_default_col_names_and_types(benchmark)
+        assert col_names is schema.displayed_names
+        assert col_types is schema.displayed_types
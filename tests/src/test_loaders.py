@@ -1,13 +1,48 @@
+import json
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from src.loaders import load_eval_results, load_leaderboard_datastore, load_raw_eval_results
+from src.columns import COL_NAME_IS_ANONYMOUS
+from src.loaders import (
+    LazyDatastoreDict,
+    load_eval_results,
+    load_leaderboard_datastore,
+    load_raw_eval_results,
+    read_score_cache,
+    refresh_eval_results,
+)
+from src.utils import get_benchmark_cols
 
 cur_fp = Path(__file__)
 
 
+@pytest.fixture
+def toy_results_path(tmp_path):
+    """Copy the toy submission of AIR-Bench_24.04 into several submissions with different models"""
+    version = "AIR-Bench_24.04"
+    src_fp = (
+        cur_fp.parents[1]
+        / f"toydata/eval_results/{version}"
+        / "bge-m3/jina-reranker-v2-base-multilingual/results.json"
+    )
+    with open(src_fp) as f:
+        model_data = json.load(f)
+    for i, retrieval_model in enumerate(["bge-m3", "e5-mistral-7b-instruct", "jina-embeddings-v2-base-en"]):
+        for item in model_data:
+            item["config"]["retrieval_model"] = retrieval_model
+            item["config"]["timestamp"] = f"2024-06-2{i}T08:28:05Z"
+            for result in item["results"]:
+                result["value"] = round(result["value"] * (1 - i / 10), 5)
+        output_fp = tmp_path / version / retrieval_model / "NoReranker" / "results.json"
+        output_fp.parent.mkdir(parents=True)
+        with open(output_fp, "w") as f:
+            json.dump(model_data, f)
+    return tmp_path
+
+
 @pytest.mark.parametrize("version", ["AIR-Bench_24.04", "AIR-Bench_24.05"])
 def test_load_raw_eval_results(version):
     raw_data = load_raw_eval_results(cur_fp.parents[1] / f"toydata/eval_results/{version}")
@@ -44,3 +79,191 @@ def test_load_eval_results():
     file_path = cur_fp.parents[1] / "toydata/eval_results/"
     datastore_dict = load_eval_results(file_path)
     assert len(datastore_dict) == 2
+
+
+def test_load_leaderboard_datastore_parallel(toy_results_path):
+    version = "AIR-Bench_24.04"
+    serial_ds = load_leaderboard_datastore(toy_results_path / version, version, num_workers=1)
+    parallel_ds = load_leaderboard_datastore(toy_results_path / version, version, num_workers=2)
+    assert len(parallel_ds.meta_df) == 3
+    pd.testing.assert_frame_equal(parallel_ds.meta_df, serial_ds.meta_df)
+    assert np.array_equal(parallel_ds.scores, serial_ds.scores, equal_nan=True)
+    pd.testing.assert_frame_equal(parallel_ds.qa_raw_df, serial_ds.qa_raw_df)
+    pd.testing.assert_frame_equal(parallel_ds.doc_fmt_df, serial_ds.doc_fmt_df)
+
+
+def test_load_leaderboard_datastore_with_cache(toy_results_path, tmp_path, monkeypatch):
+    version = "AIR-Bench_24.04"
+    results_path = toy_results_path / version
+    cache_path = tmp_path / "score_cache"
+    # a submission without the link of its retrieval model
+    null_link_fp = results_path / "e5-mistral-7b-instruct" / "NoReranker" / "results.json"
+    with open(null_link_fp) as f:
+        model_data = json.load(f)
+    for item in model_data:
+        item["config"]["retrieval_model_link"] = None
+    with open(null_link_fp, "w") as f:
+        json.dump(model_data, f)
+    expected_ds = load_leaderboard_datastore(results_path, version)
+
+    import src.loaders
+
+    parsed_files = []
+    load_scores_from_json_file = src.loaders.load_scores_from_json_file
+
+    def _load_scores_from_json_file(json_filepath, *args, **kwargs):
+        parsed_files.append(json_filepath)
+        return load_scores_from_json_file(json_filepath, *args, **kwargs)
+
+    monkeypatch.setattr(src.loaders, "load_scores_from_json_file", _load_scores_from_json_file)
+
+    # cold start parses all the files and writes the cache
+    ds = load_leaderboard_datastore(results_path, version, cache_path=cache_path)
+    assert len(parsed_files) == 3
+    assert (cache_path / "air_bench_2404.npz").exists()
+    pd.testing.assert_frame_equal(ds.qa_raw_df, expected_ds.qa_raw_df)
+    pd.testing.assert_frame_equal(ds.doc_fmt_df, expected_ds.doc_fmt_df)
+    assert ds.reranking_models == expected_ds.reranking_models
+
+    # warm start reads the cache only
+    parsed_files.clear()
+    ds = load_leaderboard_datastore(results_path, version, cache_path=cache_path)
+    assert parsed_files == []
+    pd.testing.assert_frame_equal(ds.meta_df, expected_ds.meta_df)
+    pd.testing.assert_frame_equal(ds.qa_raw_df, expected_ds.qa_raw_df)
+    pd.testing.assert_frame_equal(ds.doc_fmt_df, expected_ds.doc_fmt_df)
+
+    # only the changed file is parsed again
+    changed_fp = results_path / "bge-m3" / "NoReranker" / "results.json"
+    with open(changed_fp) as f:
+        model_data = json.load(f)
+    for item in model_data:
+        item["config"]["is_anonymous"] = True
+    with open(changed_fp, "w") as f:
+        json.dump(model_data, f)
+    ds = load_leaderboard_datastore(results_path, version, cache_path=cache_path)
+    assert parsed_files == [str(changed_fp)]
+    assert ds.qa_raw_df[COL_NAME_IS_ANONYMOUS].sum() == 1
+    assert len(ds.qa_fmt_df) == 2
+
+
+def test_read_score_cache_drops_broken_cache(toy_results_path, tmp_path):
+    version = "AIR-Bench_24.04"
+    cache_path = tmp_path / "score_cache"
+    expected_ds = load_leaderboard_datastore(toy_results_path / version, version, cache_path=cache_path)
+    cache_filepath = cache_path / "air_bench_2404.npz"
+    benchmark_cols = get_benchmark_cols("air_bench_2404")
+    assert read_score_cache(cache_filepath, benchmark_cols) is not None
+    with np.load(cache_filepath) as data:
+        arrays = {k: data[k] for k in data.files}
+    content = cache_filepath.read_bytes()
+
+    # a truncated file
+    cache_filepath.write_bytes(content[: len(content) // 2])
+    assert read_score_cache(cache_filepath, benchmark_cols) is None
+    # a cache without its format version or one of its arrays
+    for key in ["format_version", "scores", "meta_null_1"]:
+        np.savez(cache_filepath, **{k: v for k, v in arrays.items() if k != key})
+        assert read_score_cache(cache_filepath, benchmark_cols) is None
+
+    # the result files are parsed again
+    ds = load_leaderboard_datastore(toy_results_path / version, version, cache_path=cache_path)
+    pd.testing.assert_frame_equal(ds.qa_raw_df, expected_ds.qa_raw_df)
+    assert read_score_cache(cache_filepath, benchmark_cols) is not None
+
+
+def test_refresh_eval_results(toy_results_path, tmp_path):
+    version = "AIR-Bench_24.04"
+    cache_path = tmp_path / "score_cache"
+    ds = load_leaderboard_datastore(toy_results_path / version, version, cache_path=cache_path)
+    ds_dict = {version: ds}
+
+    # nothing changed
+    assert refresh_eval_results(toy_results_path, ds_dict, cache_path=cache_path) == []
+    assert ds_dict[version] is ds
+
+    # a new submission arrives
+    src_fp = toy_results_path / version / "bge-m3" / "NoReranker" / "results.json"
+    with open(src_fp) as f:
+        model_data = json.load(f)
+    for item in model_data:
+        item["config"]["retrieval_model"] = "bge-large-en-v1.5"
+        item["config"]["timestamp"] = "2024-07-01T08:28:05Z"
+    output_fp = toy_results_path / version / "bge-large-en-v1.5" / "NoReranker" / "results.json"
+    output_fp.parent.mkdir(parents=True)
+    with open(output_fp, "w") as f:
+        json.dump(model_data, f)
+    assert refresh_eval_results(toy_results_path, ds_dict, cache_path=cache_path) == [version]
+    assert ds_dict[version] is not ds
+    assert len(ds.qa_raw_df) == 3
+    assert len(ds_dict[version].qa_raw_df) == 4
+
+
+def test_lazy_datastore_dict(toy_results_path, monkeypatch):
+    import threading
+    import time
+
+    import src.loaders
+
+    versions = ["AIR-Bench_24.04", "AIR-Bench_24.05"]
+    loaded = []
+
+    def _load_leaderboard_datastore(file_path, version, *args):
+        loaded.append(version)
+        time.sleep(0.05)
+        return load_leaderboard_datastore(toy_results_path / "AIR-Bench_24.04", "AIR-Bench_24.04", *args)
+
+    monkeypatch.setattr(src.loaders, "load_leaderboard_datastore", _load_leaderboard_datastore)
+    ds_dict = LazyDatastoreDict(toy_results_path, versions=versions)
+    assert list(ds_dict) == versions
+    assert "AIR-Bench_24.04" in ds_dict
+    assert loaded == []
+
+    # concurrent requests of the same version load it only once
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ds_dict["AIR-Bench_24.04"])) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loaded == ["AIR-Bench_24.04"]
+    assert all(ds is results[0] for ds in results)
+    assert list(ds_dict.loaded()) == ["AIR-Bench_24.04"]
+
+    # only the loaded versions are refreshed
+    assert refresh_eval_results(toy_results_path, ds_dict) == []
+    assert loaded == ["AIR-Bench_24.04"]
+
+    ds_dict.preload().join()
+    assert loaded == versions
+    assert list(ds_dict.loaded()) == versions
+
+
+def test_load_leaderboard_datastore_streaming(toy_results_path, tmp_path):
+    version = "AIR-Bench_24.04"
+    ds = load_leaderboard_datastore(toy_results_path / version, version)
+    streaming_ds = load_leaderboard_datastore(toy_results_path / version, version, streaming=True)
+    pd.testing.assert_frame_equal(streaming_ds.qa_raw_df, ds.qa_raw_df)
+    pd.testing.assert_frame_equal(streaming_ds.doc_fmt_df, ds.doc_fmt_df)
+    parallel_ds = load_leaderboard_datastore(toy_results_path / version, version, num_workers=2, streaming=True)
+    pd.testing.assert_frame_equal(parallel_ds.qa_raw_df, ds.qa_raw_df)
+    cached_ds = load_leaderboard_datastore(
+        toy_results_path / version, version, cache_path=tmp_path / "score_cache", streaming=True
+    )
+    pd.testing.assert_frame_equal(cached_ds.qa_raw_df, ds.qa_raw_df)
+
+
+def test_load_raw_eval_results_skips_broken_files(toy_results_path):
+    version = "AIR-Bench_24.04"
+    fp = toy_results_path / version / "bge-m3" / "NoReranker" / "results.json"
+    with open(fp) as f:
+        model_data = json.load(f)
+    del model_data[0]["results"][0]["value"]
+    with open(fp, "w") as f:
+        json.dump(model_data, f)
+
+    raw_data = load_raw_eval_results(toy_results_path / version)
+    assert sorted(r.retrieval_model for r in raw_data) == ["e5-mistral-7b-instruct", "jina-embeddings-v2-base-en"]
+    for streaming in [False, True]:
+        ds = load_leaderboard_datastore(toy_results_path / version, version, streaming=streaming)
+        assert len(ds.meta_df) == 2
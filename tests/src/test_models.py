@@ -1,8 +1,16 @@
+import json
 from pathlib import Path
 
+import numpy as np
 import pytest
 
-from src.models import EvalResult, FullEvalResult
+from src.models import (
+    BenchmarkResults,
+    EvalResult,
+    FullEvalResult,
+    iter_json_items,
+    load_scores_from_json_file,
+)
 
 cur_fp = Path(__file__)
 
@@ -87,3 +95,95 @@ def test_full_eval_result_to_dict(file_path, task, expected_num_results):
     )
     result_cols = list(result.keys())
     assert len(result_cols) == (expected_num_results + len(attr_list))
+
+
+@pytest.mark.parametrize(
+    "file_path, num_qa_benchmarks, num_doc_benchmarks",
+    [
+        (
+            "AIR-Bench_24.04/bge-m3/jina-reranker-v2-base-multilingual/results.json",
+            NUM_QA_BENCHMARKS_24_04,
+            NUM_DOC_BENCHMARKS_24_04,
+        ),
+        ("AIR-Bench_24.05/bge-m3/NoReranker/results.json", NUM_QA_BENCHMARKS_24_05, NUM_DOC_BENCHMARKS_24_05),
+    ],
+)
+def test_full_eval_result_to_scores(file_path, num_qa_benchmarks, num_doc_benchmarks):
+    json_fp = cur_fp.parents[1] / "toydata/eval_results/" / file_path
+    full_eval_result = FullEvalResult.init_from_json_file(json_fp)
+    metrics = ["ndcg_at_10", "recall_at_10", "missing_metric"]
+    qa_record = full_eval_result.to_dict("qa", "ndcg_at_10")[0]
+    doc_record = full_eval_result.to_dict("long-doc", "ndcg_at_10")[0]
+    benchmark_cols = {
+        "qa": [c for c in qa_record if c.islower() and c != "eval_name"],
+        "long-doc": [c for c in doc_record if c.islower() and c != "eval_name"],
+    }
+    assert len(benchmark_cols["qa"]) == num_qa_benchmarks
+    assert len(benchmark_cols["long-doc"]) == num_doc_benchmarks
+    scores, has_scores = full_eval_result.to_scores(benchmark_cols, metrics)
+    assert scores.shape == (2, len(metrics), max(num_qa_benchmarks, num_doc_benchmarks))
+    assert has_scores.tolist() == [[True, True, False], [True, True, False]]
+    assert list(scores[0, 0, :num_qa_benchmarks]) == [qa_record[c] for c in benchmark_cols["qa"]]
+    assert list(scores[1, 0, :num_doc_benchmarks]) == [doc_record[c] for c in benchmark_cols["long-doc"]]
+
+
+def test_iter_json_items():
+    json_fp = cur_fp.parents[1] / "toydata/eval_results/AIR-Bench_24.05/bge-m3/NoReranker/results.json"
+    with open(json_fp) as f:
+        expected = json.load(f)
+    assert list(iter_json_items(json_fp)) == expected
+
+
+@pytest.mark.parametrize("streaming, use_orjson", [(True, False), (False, False), (False, True)])
+@pytest.mark.parametrize(
+    "file_path",
+    [
+        "AIR-Bench_24.04/bge-m3/jina-reranker-v2-base-multilingual/results.json",
+        "AIR-Bench_24.05/bge-m3/NoReranker/results.json",
+    ],
+)
+def test_load_scores_from_json_file(file_path, streaming, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    json_fp = cur_fp.parents[1] / "toydata/eval_results/" / file_path
+    full_eval_result = FullEvalResult.init_from_json_file(json_fp)
+    qa_record = full_eval_result.to_dict("qa", "ndcg_at_10")[0]
+    doc_record = full_eval_result.to_dict("long-doc", "ndcg_at_10")[0]
+    benchmark_cols = {
+        "qa": [c for c in qa_record if c.islower() and c != "eval_name"],
+        "long-doc": [c for c in doc_record if c.islower() and c != "eval_name"],
+    }
+    metrics = ["ndcg_at_10", "recall_at_10", "missing_metric"]
+    expected_scores, expected_has_scores = full_eval_result.to_scores(benchmark_cols, metrics)
+    meta, scores, has_scores = load_scores_from_json_file(json_fp, benchmark_cols, metrics, streaming, use_orjson)
+    assert meta == full_eval_result.to_meta()
+    assert np.array_equal(scores, expected_scores, equal_nan=True)
+    assert np.array_equal(has_scores, expected_has_scores)
+
+
+def test_load_scores_from_empty_json_file(tmp_path):
+    json_fp = tmp_path / "results.json"
+    json_fp.write_text(" [ ] ")
+    with pytest.raises(IndexError):
+        load_scores_from_json_file(json_fp, {"qa": []}, ["ndcg_at_10"])
+
+
+def test_benchmark_results():
+    import pickle
+
+    result_list = [
+        {"domain": "law", "lang": "en", "dataset": "lex_files_500K-600K", "value": 0.45723},
+        {"domain": "wiki", "lang": "en", "dataset": "default", "value": 0.5},
+        {"domain": "law", "lang": "en", "dataset": "lex_files_500K-600K", "value": 0.1},
+    ]
+    results = BenchmarkResults.from_list(result_list)
+    assert len(results) == 3
+    assert list(results) == result_list
+    # the keys are interned and shared by all the results
+    assert results.codes[0] == results.codes[2]
+    assert BenchmarkResults.from_list(result_list[:2]).codes.tolist() == results.codes.tolist()[:2]
+    assert pickle.loads(pickle.dumps(results)) == results
+
+    eval_result = EvalResult("eval_name", "bge-m3", "NoReranker", result_list, "qa", "ndcg_at_3")
+    assert isinstance(eval_result.results, BenchmarkResults)
+    assert not hasattr(eval_result, "__dict__")
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from src.profiling import ImportProfiler
+
+cur_fp = Path(__file__)
+
+
+def test_import_profiler():
+    sys.modules.pop("colorsys", None)
+    profiler = ImportProfiler()
+    profiler.start()
+    import colorsys  # noqa: F401
+
+    profiler.stop()
+    assert "colorsys" in profiler.timings
+    self_time, cumulative = profiler.timings["colorsys"]
+    assert 0 <= self_time <= cumulative
+    assert "colorsys" in profiler.report()
+
+
+def test_loaders_skip_the_ui_stack():
+    code = (
+        "import sys; import src.loaders; "
+        "print(','.join(m for m in ('gradio', 'huggingface_hub', 'air_benchmark') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=cur_fp.parents[2], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,49 @@
+import os
+
+from src.sync import LocalResultsSource, get_sync_patterns, plan_sync, sync_eval_results
+
+REPO_FILES = [
+    ".gitattributes",
+    "README.md",
+    "AIR-Bench_24.04/bge-m3/NoReranker/results.json",
+    "AIR-Bench_24.04/bge-m3/bge-reranker-v2-m3/results_20240601000000-abc.json",
+    "AIR-Bench_24.05/bge-m3/NoReranker/results.json",
+    "AIR-Bench_24.05/bge-m3/NoReranker/results_20241201071239-70de025455132e3b6d6a7786130cf91f.json",
+    "AIR-Bench_24.05/bge-m3/NoReranker/results_20241202000000-def.json",
+    "AIR-Bench_24.05/bge-m3/NoReranker/search_results.zip",
+    "AIR-Bench_23.01/bge-m3/NoReranker/results.json",
+]
+
+
+def test_plan_sync():
+    allow_patterns, ignore_patterns = get_sync_patterns()
+    assert plan_sync(REPO_FILES, allow_patterns, ignore_patterns) == [
+        "AIR-Bench_24.04/bge-m3/NoReranker/results.json",
+        "AIR-Bench_24.04/bge-m3/bge-reranker-v2-m3/results_20240601000000-abc.json",
+        "AIR-Bench_24.05/bge-m3/NoReranker/results_20241202000000-def.json",
+    ]
+    allow_patterns, ignore_patterns = get_sync_patterns(["AIR-Bench_24.04"], [])
+    assert len(plan_sync(REPO_FILES, allow_patterns, ignore_patterns)) == 2
+
+
+def test_sync_eval_results(tmp_path):
+    repo_path = tmp_path / "repo"
+    for path in REPO_FILES:
+        fp = repo_path / path
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        fp.write_text(path)
+    local_path = tmp_path / "eval_results"
+    source = LocalResultsSource(repo_path)
+
+    planned = sync_eval_results(source, local_path, max_workers=4)
+    assert len(planned) == 3
+    local_files = sorted(p.relative_to(local_path).as_posix() for p in local_path.rglob("*") if p.is_file())
+    assert local_files == sorted(planned)
+
+    # the files that did not change are not copied again
+    assert [source.download(path, local_path) for path in planned] == [False, False, False]
+    fp = repo_path / planned[0]
+    fp.write_text("updated results")
+    os.utime(fp, ns=(0, 0))
+    sync_eval_results(source, local_path)
+    assert (local_path / planned[0]).read_text() == "updated results"
@@ -1,20 +1,42 @@
+import hashlib
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from src.columns import COL_NAME_RERANKING_MODEL, COL_NAME_RETRIEVAL_MODEL
+from src.columns import COL_NAME_RERANKING_MODEL, COL_NAME_RERANKING_MODEL_NAME, COL_NAME_RETRIEVAL_MODEL
 from src.models import TaskType, model_hyperlink
 from src.utils import (
+    BM25_LINK,
+    LEADERBOARD_DF_CACHE,
+    LEADERBOARD_VIEW_FILTERS,
+    VIEW_RERANKING_ONLY,
+    VIEW_RETRIEVAL_ONLY,
+    LeaderboardDFCache,
+    SubTabState,
     _update_df_elem,
+    add_submission_ticket,
+    build_leaderboard_views,
+    calculate_file_md5,
     calculate_mean,
+    calculate_means,
+    check_submission,
     filter_models,
     filter_queries,
     get_default_cols,
     get_leaderboard_df,
+    get_leaderboard_view,
     get_selected_cols,
+    get_submission_status,
     remove_html,
     select_columns,
+    submit_results,
+    upload_submission,
+    validate_submission_zip,
 )
 
 cur_fp = Path(__file__)
@@ -60,6 +82,21 @@ def test_calculate_mean():
     assert result[1] == -1
 
 
+def test_calculate_means():
+    valid_row = [1, 3]
+    invalid_row = [2, pd.NA]
+    df = pd.DataFrame([valid_row, invalid_row], columns=["a", "b"])
+    result = list(calculate_means(df))
+    assert result[0] == sum(valid_row) / 2
+    assert result[1] == -1
+
+    rng = np.random.default_rng(0)
+    values = rng.random((100, 53)) * 100
+    values[rng.random((100, 53)) < 0.01] = np.nan
+    df = pd.DataFrame(values)
+    assert calculate_means(df).equals(df.apply(calculate_mean, axis=1))
+
+
 @pytest.mark.parametrize(
     "models, expected",
     [
@@ -89,6 +126,12 @@ def test_filter_models(models, expected):
     output_df = filter_models(df, models)
     assert len(output_df) == expected
 
+    # the precomputed plain-text names are used when available
+    df[COL_NAME_RERANKING_MODEL_NAME] = df[COL_NAME_RERANKING_MODEL]
+    df[COL_NAME_RERANKING_MODEL] = [model_hyperlink("https://example.com", m) for m in df[COL_NAME_RERANKING_MODEL]]
+    output_df = filter_models(df, models)
+    assert len(output_df) == expected
+
 
 @pytest.mark.parametrize(
     "query, expected",
@@ -97,6 +140,10 @@ def test_filter_models(models, expected):
         ("model1;model4", 1),
         ("model1;model2;model3", 3),
         ("model1", 1),
+        ("MODEL1; model3 ;", 2),
+        ("model[12]", 2),
+        ("model1;model1", 1),
+        ("model7", 3),
         ("", 3),
     ],
 )
@@ -218,6 +265,23 @@ def test__update_df_elem(toy_df, reset_rank, show_anony):
             assert df["Average ⬆️"].equals(toy_df["Average ⬆️"])
 
 
+@pytest.mark.parametrize("reranking_query", [[], ["NoReranker"]])
+@pytest.mark.parametrize("query", ["", "jina", "model_missing"])
+@pytest.mark.parametrize("show_anony", [True, False])
+@pytest.mark.parametrize("show_rev_ts", [True, False])
+def test__update_df_elem_matches_filters(toy_df, reranking_query, query, show_anony, show_rev_ts):
+    domains, langs = ["news", "wiki"], ["zh"]
+    df = _update_df_elem(
+        TaskType.qa, "AIR-Bench_24.04", toy_df, domains, langs, reranking_query, query, show_anony, True, show_rev_ts
+    )
+    expected = toy_df if show_anony else toy_df[~toy_df["Anonymous Submission"]]
+    expected = filter_queries(query, filter_models(expected, reranking_query))
+    expected = select_columns(expected, domains, langs, version_slug="air_bench_2404")
+    if not show_rev_ts:
+        expected = expected.drop(columns=["Revision", "Submission Date"])
+    pd.testing.assert_frame_equal(df, expected)
+
+
 @pytest.mark.parametrize(
     "version, task_type",
     [
@@ -228,10 +292,303 @@ def test__update_df_elem(toy_df, reset_rank, show_anony):
     ],
 )
 def test_get_leaderboard_df(version, task_type):
-    from src.loaders import load_raw_eval_results
+    from src.loaders import load_cached_score_store
     from src.models import LeaderboardDataStore, get_safe_name
 
-    raw_data = load_raw_eval_results(cur_fp.parents[1] / f"toydata/eval_results/{version}")
-    ds = LeaderboardDataStore(version, get_safe_name(version), raw_data=raw_data)
+    results_path = cur_fp.parents[1] / f"toydata/eval_results/{version}"
+    ds = load_cached_score_store(LeaderboardDataStore(version, get_safe_name(version)), results_path, None)
     df = get_leaderboard_df(ds, task_type, "ndcg_at_10")
     assert df.shape[0] == 1
+
+
+@pytest.mark.parametrize(
+    "task_type, metric",
+    [
+        (TaskType.qa, "ndcg_at_10"),
+        (TaskType.qa, "recall_at_1000"),
+        (TaskType.long_doc, "recall_at_10"),
+        (TaskType.long_doc, "mrr_at_3"),
+    ],
+)
+def test_get_leaderboard_df_matches_records(task_type, metric):
+    from src.loaders import load_cached_score_store, load_raw_eval_results
+    from src.models import LeaderboardDataStore
+
+    version = "AIR-Bench_24.04"
+    results_path = cur_fp.parents[1] / f"toydata/eval_results/{version}"
+    raw_data = load_raw_eval_results(results_path)
+    ds = load_cached_score_store(LeaderboardDataStore(version, "air_bench_2404"), results_path, None)
+    assert ds.scores.shape[:3] == (len(raw_data), 2, 30)
+    df = get_leaderboard_df(ds, task_type, metric)
+    record = raw_data[0].to_dict(task=task_type.value, metric=metric)[0]
+    benchmark_cols, _ = get_default_cols(task_type, "air_bench_2404", add_fix_cols=False)
+    for col in benchmark_cols:
+        assert df[col][0] == round(record[col], 2)
+
+
+def test_leaderboard_df_cache():
+    from src.loaders import load_cached_score_store
+    from src.models import LeaderboardDataStore
+
+    version = "AIR-Bench_24.04"
+    results_path = cur_fp.parents[1] / f"toydata/eval_results/{version}"
+    ds = load_cached_score_store(LeaderboardDataStore(version, "air_bench_2404"), results_path, None)
+    cache = LeaderboardDFCache(maxsize=2)
+
+    df = cache.get(ds, TaskType.qa, "ndcg_at_10")
+    assert cache.get(ds, TaskType.qa, "ndcg_at_10") is df
+    assert cache.cache_info() == {"hits": 1, "misses": 1, "maxsize": 2, "currsize": 1}
+
+    # the least recently used dataframe is evicted
+    cache.get(ds, TaskType.qa, "ndcg_at_1")
+    cache.get(ds, TaskType.qa, "ndcg_at_10")
+    cache.get(ds, TaskType.long_doc, "ndcg_at_10")
+    assert cache.cache_info()["currsize"] == 2
+    cache.get(ds, TaskType.qa, "ndcg_at_1")
+    assert cache.cache_info()["misses"] == 4
+
+    # reloading the data drops the dataframes of the older generation
+    new_ds = load_cached_score_store(LeaderboardDataStore(version, "air_bench_2404"), results_path, None)
+    # each datastore takes its own generation, so the frames of one are never returned for another
+    assert new_ds.generation != ds.generation
+    assert LeaderboardDataStore(version, "air_bench_2404", generation=7).generation == 7
+    cache.invalidate(new_ds)
+    assert cache.cache_info()["currsize"] == 0
+    assert cache.get(new_ds, TaskType.qa, "ndcg_at_10") is not df
+
+    # the views of the sub-tabs are cached next to the frame they are taken from
+    cache.clear()
+    df_rerank = cache.get(new_ds, TaskType.qa, "ndcg_at_10", VIEW_RERANKING_ONLY)
+    assert cache.get(new_ds, TaskType.qa, "ndcg_at_10", VIEW_RERANKING_ONLY) is df_rerank
+    assert cache.cache_info() == {"hits": 1, "misses": 2, "maxsize": 2, "currsize": 2}
+    expected = LEADERBOARD_VIEW_FILTERS[VIEW_RERANKING_ONLY](cache.get(new_ds, TaskType.qa, "ndcg_at_10"))
+    pd.testing.assert_frame_equal(df_rerank, expected)
+
+
+def test_calculate_file_md5(tmp_path):
+    fp = tmp_path / "results.zip"
+    content = bytes(range(256)) * 1000
+    fp.write_bytes(content)
+    assert calculate_file_md5(fp, chunk_size=1000) == hashlib.md5(content).hexdigest()
+    assert calculate_file_md5(fp) == hashlib.md5(content).hexdigest()
+
+
+class LocalHfApi:
+    """A stand-in for HfApi that records the commits instead of pushing them"""
+
+    def __init__(self, wait_for=None):
+        self.commits = []
+        self.wait_for = wait_for
+
+    def create_commit(self, repo_id, operations, commit_message, repo_type=None, **kwargs):
+        if self.wait_for is not None:
+            self.wait_for.wait(timeout=10)
+        files = {}
+        for op in operations:
+            with open(op.path_or_fileobj, "rb") as f:
+                files[op.path_in_repo] = f.read()
+        self.commits.append({"repo_id": repo_id, "message": commit_message, "files": files})
+
+
+def test_upload_submission(tmp_path):
+    fp = tmp_path / "20240101-abc.zip"
+    fp.write_bytes(b"search results")
+    config_fp = tmp_path / "20240101-abc.json"
+    config_fp.write_text("{}")
+
+    api = LocalHfApi()
+    upload_submission(str(fp), str(config_fp), "bge-m3", "NoReranker", "AIR-Bench_24.04", fp.name, api=api)
+    assert len(api.commits) == 1
+    assert api.commits[0]["files"] == {
+        "AIR-Bench_24.04/bge-m3/NoReranker/20240101-abc.zip": b"search results",
+        "AIR-Bench_24.04/bge-m3/NoReranker/20240101-abc.json": b"{}",
+    }
+
+
+def write_submission_zip(fp, version, skip=0, extra=()):
+    from src.benchmarks import get_search_result_files
+
+    files = sorted(get_search_result_files(version))[skip:] + list(extra)
+    with zipfile.ZipFile(fp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for task, domain, fn in files:
+            zf.writestr(f"bge-m3/NoReranker/{task}/{domain}/{fn}", "{}")
+    return fp
+
+
+def test_validate_submission_zip(tmp_path):
+    version = "AIR-Bench_24.04"
+    fp = write_submission_zip(tmp_path / "complete.zip", version)
+    assert validate_submission_zip(fp, version) == ([], [])
+    assert "cover all the datasets" in check_submission(str(fp), version)
+
+    extra_file = ("qa", "wiki", "xx_default_test.json")
+    fp = write_submission_zip(tmp_path / "partial.zip", version, skip=2, extra=[extra_file])
+    missing, extra = validate_submission_zip(fp, version)
+    assert len(missing) == 2
+    assert extra == [extra_file]
+    # the missing file names are only a warning, like in `submit_results`
+    assert "Warning: the files of 2 datasets of AIR-Bench_24.04 are not found by name" in check_submission(
+        str(fp), version
+    )
+
+    # the datasets of another version are reported as missing
+    assert len(validate_submission_zip(fp, "AIR-Bench_24.05")[0]) > 0
+
+    fp = tmp_path / "broken.zip"
+    fp.write_bytes(b"search results")
+    assert "broken zip file" in check_submission(str(fp), version)
+    assert check_submission(None, version) == ""
+
+
+def write_corrupted_submission_zip(fp, version):
+    write_submission_zip(fp, version)
+    with zipfile.ZipFile(fp, "a", compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr("bge-m3/NoReranker/README.md", "search results of bge-m3")
+    # change a stored member without updating its crc
+    fp.write_bytes(fp.read_bytes().replace(b"search results of bge-m3", b"search results of bge-m4"))
+    return fp
+
+
+def test_submit_results_refuses_corrupted_zip(tmp_path, monkeypatch):
+    import src.envs
+
+    api = LocalHfApi()
+    monkeypatch.setattr(src.envs, "API", api)
+    version = "AIR-Bench_24.04"
+    fp = write_corrupted_submission_zip(tmp_path / "results.zip", version)
+    assert "broken zip file" in check_submission(str(fp), version)
+    msg = submit_results(str(fp), "bge-m3", "https://huggingface.co/BAAI/bge-m3", "NoReranker", version=version)
+    assert "Broken zip file" in msg
+    # the zips that were never checked at upload time are checked before the submission
+    fp = write_corrupted_submission_zip(tmp_path / "unchecked.zip", version)
+    msg = submit_results(str(fp), "bge-m3", "https://huggingface.co/BAAI/bge-m3", "NoReranker", version=version)
+    assert "Broken zip file" in msg
+    assert api.commits == []
+
+
+def test_submit_results_in_background(tmp_path, monkeypatch):
+    import threading
+
+    import src.envs
+    import src.utils
+
+    release = threading.Event()
+    api = LocalHfApi(wait_for=release)
+    monkeypatch.setattr(src.envs, "API", api)
+    fp = write_submission_zip(tmp_path / "results.zip", "AIR-Bench_24.04")
+
+    msg = submit_results(
+        str(fp), "bge-m3", "https://huggingface.co/BAAI/bge-m3", "NoReranker", version="AIR-Bench_24.04"
+    )
+    ticket = msg.split("Submission ticket: ")[1].split(".")[0]
+    assert "still uploading" in get_submission_status(ticket)
+    release.set()
+    src.utils.SUBMISSION_TICKETS[ticket].result(timeout=10)
+    assert "is uploaded" in get_submission_status(ticket)
+    assert len(api.commits) == 1
+    assert len(api.commits[0]["files"]) == 2
+    assert "unknown" in get_submission_status("not-a-ticket")
+
+
+def test_add_submission_ticket(monkeypatch):
+    import src.utils
+
+    monkeypatch.setattr(src.utils, "SUBMISSION_TICKETS", OrderedDict())
+    futures = [Future() for _ in range(4)]
+    for i in [0, 2]:
+        futures[i].set_result(None)
+    for i, future in enumerate(futures):
+        add_submission_ticket(f"ticket-{i}", future, max_tickets=2)
+    # the finished uploads are dropped first, the running ones are kept beyond the limit
+    assert list(src.utils.SUBMISSION_TICKETS) == ["ticket-1", "ticket-3"]
+    assert "unknown" in get_submission_status("ticket-0")
+    assert "still uploading" in get_submission_status("ticket-1")
+
+    futures[1].set_result(None)
+    add_submission_ticket("ticket-4", Future(), max_tickets=2)
+    assert list(src.utils.SUBMISSION_TICKETS) == ["ticket-3", "ticket-4"]
+
+
+def test_submit_results_with_other_file_names(tmp_path, monkeypatch):
+    import src.envs
+    import src.utils
+    from src.benchmarks import get_search_result_files
+
+    api = LocalHfApi()
+    monkeypatch.setattr(src.envs, "API", api)
+    # the search results of AIR-Bench_24.04 had no split in their names
+    version = "AIR-Bench_24.04"
+    files = [
+        (task, domain, fn.replace("_test.json", ".json")) for task, domain, fn in get_search_result_files(version)
+    ]
+    fp = write_submission_zip(tmp_path / "results.zip", version, skip=len(files), extra=files)
+    warning = f"Warning: the files of {len(files)} datasets of {version} are not found by name"
+    assert warning in check_submission(str(fp), version)
+    num_checks = src.utils._check_zip_members.cache_info().misses
+    msg = submit_results(str(fp), "bge-m3", "https://huggingface.co/BAAI/bge-m3", "NoReranker", version=version)
+    assert "Submission ticket: " in msg
+    assert warning in msg
+    # the members checked at upload time are not decompressed again
+    assert src.utils._check_zip_members.cache_info().misses == num_checks
+    ticket = msg.split("Submission ticket: ")[1].split(".")[0]
+    src.utils.SUBMISSION_TICKETS[ticket].result(timeout=10)
+    assert len(api.commits) == 1
+
+
+def test_get_leaderboard_view(toy_df):
+    from src.models import LeaderboardDataStore
+
+    toy_df = toy_df.copy()
+    toy_df.loc[2, "Retrieval Method"] = BM25_LINK
+    ds = LeaderboardDataStore(
+        "AIR-Bench_24.04", "air_bench_2404", qa_fmt_df=toy_df, qa_raw_df=toy_df, doc_fmt_df=toy_df, doc_raw_df=toy_df
+    )
+    build_leaderboard_views(ds)
+
+    df_ret = get_leaderboard_view(ds, TaskType.qa, VIEW_RETRIEVAL_ONLY)
+    assert df_ret["Reranking Model"].tolist() == ["NoReranker", "NoReranker"]
+    assert df_ret["Rank 🏆"].tolist() == [1, 2]
+    # the views are built once for each datastore
+    assert get_leaderboard_view(ds, TaskType.qa, VIEW_RETRIEVAL_ONLY) is df_ret
+    assert get_leaderboard_view(ds, TaskType.qa, VIEW_RETRIEVAL_ONLY, hidden=True) is not df_ret
+
+    df_rerank = get_leaderboard_view(ds, TaskType.qa, VIEW_RERANKING_ONLY)
+    assert df_rerank["Revision"].tolist() == ["345"]
+    assert df_rerank["Rank 🏆"].tolist() == [1]
+    # the source frame is not modified
+    assert toy_df["Rank 🏆"].tolist() == [1, 2, 3, 4]
+
+
+def test_get_leaderboard_view_hidden():
+    from src.loaders import load_leaderboard_datastore
+
+    version = "AIR-Bench_24.04"
+    ds = load_leaderboard_datastore(cur_fp.parents[1] / f"toydata/eval_results/{version}", version)
+    # the hidden views are taken from the raw frames of the datastore
+    df_ret = get_leaderboard_view(ds, TaskType.qa, VIEW_RETRIEVAL_ONLY, hidden=True)
+    pd.testing.assert_frame_equal(df_ret, LEADERBOARD_VIEW_FILTERS[VIEW_RETRIEVAL_ONLY](ds.qa_raw_df))
+    df_rerank = get_leaderboard_view(ds, TaskType.long_doc, VIEW_RERANKING_ONLY, hidden=True)
+    pd.testing.assert_frame_equal(df_rerank, LEADERBOARD_VIEW_FILTERS[VIEW_RERANKING_ONLY](ds.doc_raw_df))
+    # metric switches on the shared frame cache do not evict the views of the datastore
+    LEADERBOARD_DF_CACHE.clear()
+    assert get_leaderboard_view(ds, TaskType.qa, VIEW_RETRIEVAL_ONLY, hidden=True) is df_ret
+
+
+def test_sub_tab_state():
+    state = SubTabState(3)
+    assert not state.select(0)
+
+    # a change of the shared selectors only updates the active sub-tab
+    assert state.change() == 0
+    state.mark_rendered(0)
+    assert state.select(1)
+    state.mark_rendered(1)
+    assert not state.select(1)
+    assert not state.select(0)
+    assert state.select(2)
+
+    # the sub-tabs that were rendered before the latest change are stale again
+    assert state.change() == 2
+    state.mark_rendered(2)
+    assert state.select(1)
+    assert state.rendered == [1, 1, 2]